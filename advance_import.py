@@ -0,0 +1,207 @@
+"""
+Bulk import of advances from a CSV file, for the GUI and the command line:
+
+    python main.py import-advances avanslar.csv
+
+Each row is employee, date, amount[, description]. The employee is an id or the
+"first last" name of exactly one employee, dates are GG.AA.YYYY or YYYY-MM-DD and
+amounts may use a decimal comma (1.500,50). Comma, semicolon or tab separated
+files are accepted and a header row is skipped.
+
+The file is read twice: once to validate every row, then, only if all rows are
+valid, to insert them with executemany in a single transaction. Rows are streamed
+from the file on both passes, so memory use does not grow with the file size.
+Rows are stored as given; unlike the advance dialog, nothing is moved to the
+previous month's remaining salary.
+"""
+import argparse
+import csv
+import sys
+from datetime import date
+
+from database import search_fold
+from money import to_kurus
+from payroll import month_index
+
+
+# Error messages kept for reporting; the remaining errors are only counted
+MAX_ERRORS = 50
+
+
+class AdvanceImportError(Exception):
+    """The file has invalid rows; nothing was imported"""
+
+    def __init__(self, errors, error_count):
+        super().__init__(f"{error_count} hatalı satır")
+        self.errors = errors
+        self.error_count = error_count
+
+    def report(self):
+        lines = list(self.errors)
+        if self.error_count > len(self.errors):
+            lines.append(f"... ve {self.error_count - len(self.errors)} hata daha")
+        return "\n".join(lines)
+
+
+def parse_date(text):
+    text = text.strip()
+    if "." in text:
+        day, month, year = map(int, text.split("."))
+        return date(year, month, day)
+    return date.fromisoformat(text)
+
+
+def parse_amount(text):
+    """Kuruş of an amount of lira as written in the file"""
+    text = text.strip().replace(" ", "")
+    if "," in text:
+        # Turkish notation: dots group thousands, the comma is the decimal point
+        text = text.replace(".", "").replace(",", ".")
+    return to_kurus(text)
+
+
+def name_key(name):
+    """
+    Name as looked up: Turkish letters folded like the employee search does, since
+    casefold() alone leaves "YILMAZ" and "Yılmaz" different, then case-folded
+    """
+    return search_fold(" ".join(name.split())).casefold()
+
+
+def employee_lookup(connection):
+    """
+    Maps employee ids and "first last" names (case-insensitively) to
+    (id, start date); names shared by several employees map to None
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT id, first_name, last_name, start_date FROM employees")
+    lookup = {}
+    for id_, first_name, last_name, start_date in cursor.fetchall():
+        employee = (id_, date.fromisoformat(start_date))
+        lookup[str(id_)] = employee
+        name = name_key(f"{first_name} {last_name}")
+        lookup[name] = None if name in lookup else employee
+    return lookup
+
+
+def _open_rows(path):
+    """
+    Opens the file and returns (handle, csv reader). The separator is a tab or a
+    semicolon if the first line has one, a comma otherwise; csv.Sniffer would take
+    the decimal commas of semicolon separated files (1.500,50) for separators.
+    """
+    handle = open(path, newline="", encoding="utf-8-sig")
+    first_line = handle.readline()
+    handle.seek(0)
+    delimiter = next((separator for separator in ("\t", ";") if separator in first_line), ",")
+    return handle, csv.reader(handle, delimiter=delimiter)
+
+
+def parse_rows(path, employees):
+    """
+    Yields (line number, row, error) for every non-empty line of the file: row is
+    (employee_id, 'YYYY-MM-DD', period, amount, description) for valid lines,
+    error a message for invalid ones.
+    """
+    handle, reader = _open_rows(path)
+    with handle:
+        for row in reader:
+            line = reader.line_num
+            if not any(field.strip() for field in row):
+                continue
+            if len(row) < 3:
+                yield line, None, f"Satır {line}: en az çalışan, tarih ve tutar olmalı"
+                continue
+            employee_field, date_field, amount_field = (field.strip() for field in row[:3])
+            description = row[3].strip() if len(row) > 3 else ""
+            try:
+                amount = parse_amount(amount_field)
+            except ValueError:
+                if line == 1:
+                    # Header row
+                    continue
+                yield line, None, f"Satır {line}: geçersiz tutar '{amount_field}'"
+                continue
+            key = employee_field if employee_field.isdigit() else name_key(employee_field)
+            if key not in employees:
+                yield line, None, f"Satır {line}: çalışan bulunamadı '{employee_field}'"
+                continue
+            if employees[key] is None:
+                yield line, None, f"Satır {line}: '{employee_field}' adında birden fazla çalışan var, ID kullanın"
+                continue
+            employee_id, start_date = employees[key]
+            try:
+                advance_date = parse_date(date_field)
+            except ValueError:
+                yield line, None, f"Satır {line}: geçersiz tarih '{date_field}'"
+                continue
+            if amount <= 0:
+                yield line, None, f"Satır {line}: tutar sıfırdan büyük olmalı"
+            elif advance_date < start_date:
+                yield line, None, f"Satır {line}: tarih işe başlama tarihinden önce"
+            else:
+                yield line, (employee_id, advance_date.isoformat(), month_index(advance_date.month, advance_date.year),
+                              amount, description), None
+
+
+def validate_advances(path, employees):
+    """Checks every row of the file; returns the number of valid rows or raises AdvanceImportError"""
+    count, errors, error_count = 0, [], 0
+    for _, row, error in parse_rows(path, employees):
+        if error is None:
+            count += 1
+            continue
+        error_count += 1
+        if len(errors) < MAX_ERRORS:
+            errors.append(error)
+    if error_count:
+        raise AdvanceImportError(errors, error_count)
+    return count
+
+
+def import_advances(connection, path):
+    """
+    Validates the file and inserts all of its advances in one transaction. Returns
+    (number of advances, set of employee ids they belong to). Raises
+    AdvanceImportError without inserting anything if any row is invalid.
+    """
+    employees = employee_lookup(connection)
+    validate_advances(path, employees)
+    employee_ids = set()
+
+    def rows():
+        for _, row, error in parse_rows(path, employees):
+            if error is not None:
+                # The file changed since it was validated
+                raise AdvanceImportError([error], 1)
+            employee_ids.add(row[0])
+            yield row
+
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(
+            "INSERT INTO advances (employee_id, date, period, amount, description) VALUES (?, ?, ?, ?, ?)", rows())
+        count = cursor.rowcount
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return count, employee_ids
+
+
+def main(argv, connection):
+    parser = argparse.ArgumentParser(prog="main.py import-advances",
+                                     description="CSV dosyasından toplu avans yükleme")
+    parser.add_argument("file", help="çalışan,tarih,tutar[,açıklama] satırlarından oluşan CSV dosyası")
+    args = parser.parse_args(argv)
+    try:
+        count, employee_ids = import_advances(connection, args.file)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"{args.file} okunamadı: {e}", file=sys.stderr)
+        return 1
+    except AdvanceImportError as e:
+        print(f"Hiçbir avans eklenmedi, {e.error_count} hatalı satır:", file=sys.stderr)
+        print(e.report(), file=sys.stderr)
+        return 1
+    print(f"{len(employee_ids)} çalışan için {count} avans eklendi")
+    return 0
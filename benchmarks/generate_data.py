@@ -0,0 +1,119 @@
+"""
+Builds a synthetic database with the application's schema for benchmarking.
+
+    python benchmarks/generate_data.py bench.db --employees 10000 --years 10
+
+Employees start on random days spread over the last --years years (ending at
+--as-of). Each employee gets --overrides salary overrides per year of tenure and
+--advances advances per month worked, all amounts in whole lira (stored as
+kuruş). The same --seed always produces the same database.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate  # noqa: E402
+from payroll import days_in_month, month_from_index, month_index  # noqa: E402
+
+
+FIRST_NAMES = ("Ahmet", "Mehmet", "Ayşe", "Fatma", "Emine", "Mustafa", "Zeynep", "Hüseyin",
+               "Elif", "İbrahim", "Şule", "Çağrı", "Gül", "Ömer", "Ümit", "Özlem")
+LAST_NAMES = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın",
+              "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Koç", "Kurt", "Özdemir")
+DESCRIPTIONS = ("", "Kira", "Market", "Yol", "Fatura", "Acil")
+
+# Rows are inserted in batches of this size within the single transaction
+BATCH = 10000
+
+
+def generate(connection, employees, years, overrides=1, advances=2, as_of=None, seed=0):
+    """
+    Fills connection with the synthetic data described in the module docstring and
+    returns the number of (employees, salary overrides, advances) rows written.
+    """
+    as_of = as_of or date.today()
+    rng = random.Random(seed)
+    migrate(connection)
+    cursor = connection.cursor()
+
+    last_index = month_index(as_of.month, as_of.year)
+    first_index = last_index - years * 12 + 1
+    counts = [0, 0, 0]
+    employee_rows, salary_rows, advance_rows = [], [], []
+
+    def flush(force=False):
+        if force or len(salary_rows) >= BATCH or len(advance_rows) >= BATCH:
+            cursor.executemany("INSERT INTO employees (id, first_name, last_name, start_date, salary) "
+                               "VALUES (?, ?, ?, ?, ?)", employee_rows)
+            cursor.executemany("INSERT INTO salaries (employee_id, period, salary) VALUES (?, ?, ?)",
+                               salary_rows)
+            cursor.executemany("INSERT INTO advances (employee_id, date, period, amount, description) "
+                               "VALUES (?, ?, ?, ?, ?)", advance_rows)
+            counts[0] += len(employee_rows)
+            counts[1] += len(salary_rows)
+            counts[2] += len(advance_rows)
+            employee_rows.clear()
+            salary_rows.clear()
+            advance_rows.clear()
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM employees")
+    next_id = cursor.fetchone()[0] + 1
+    for employee_id in range(next_id, next_id + employees):
+        start_year, start_month = month_from_index(rng.randint(first_index, last_index))
+        start_day = rng.randint(1, days_in_month(start_year, start_month))
+        base_salary = rng.randrange(17000, 60000, 500) * 100
+        employee_rows.append((employee_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                              f"{start_year:04d}-{start_month:02d}-{start_day:02d}", base_salary))
+
+        start_index = month_index(start_month, start_year)
+        tenure = range(start_index, last_index + 1)
+        override_count = min(len(tenure), round(overrides * len(tenure) / 12))
+        for index in sorted(rng.sample(tenure, override_count)):
+            salary_rows.append((employee_id, index, base_salary + rng.randrange(0, 10000, 500) * 100))
+        for index in tenure:
+            year, month = month_from_index(index)
+            first_day = start_day if index == start_index else 1
+            last_day = as_of.day if index == last_index else days_in_month(year, month)
+            if last_day < first_day:
+                continue
+            for _ in range(advances):
+                day = rng.randint(first_day, last_day)
+                advance_rows.append((employee_id, f"{year:04d}-{month:02d}-{day:02d}", index,
+                                     rng.randrange(100, 5000, 50) * 100, rng.choice(DESCRIPTIONS)))
+        flush()
+
+    flush(force=True)
+    connection.commit()
+    return tuple(counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="database file to create (must not exist)")
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--years", type=int, default=1, help="tenure of the longest-serving employees")
+    parser.add_argument("--overrides", type=float, default=1, help="salary overrides per employee per year")
+    parser.add_argument("--advances", type=int, default=2, help="advances per employee per month")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="last day of data (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+    connection = sqlite3.connect(args.path)
+    try:
+        counts = generate(connection, args.employees, args.years, args.overrides,
+                          args.advances, args.as_of, args.seed)
+    finally:
+        connection.close()
+    print("{} employees, {} salary overrides, {} advances written to {}".format(*counts, args.path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
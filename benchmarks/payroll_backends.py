@@ -0,0 +1,101 @@
+"""
+Compares the scalar and the NumPy payroll backends on an existing database.
+
+    python benchmarks/payroll_backends.py otel_maas.db --year 2026 --month 9
+
+Both backends produce every employee's row for the month; the rows are checked to
+be identical and the best of --repeat runs of each is reported with the speedup,
+once end to end (queries included) and once for the calculation alone on data
+that is already in memory.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payroll_batch  # noqa: E402
+import payroll_numpy  # noqa: E402
+from payroll import CarryCache, PayrollLedger, month_from_index  # noqa: E402
+
+
+def best_time(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def scalar_inputs(roster):
+    """The roster as the per-employee dicts PayrollLedger works on"""
+    salaries = {employee_id: {} for employee_id in roster.ids.tolist()}
+    advances = {employee_id: {} for employee_id in roster.ids.tolist()}
+    for rows, target in ((roster.overrides, salaries), (roster.sums, advances)):
+        for employee_id, index, value in rows.tolist():
+            if int(employee_id) in target:
+                target[int(employee_id)][month_from_index(int(index))] = value
+    employees = []
+    for i, employee_id in enumerate(roster.ids.tolist()):
+        start_year, start_month = month_from_index(int(roster.start_index[i]))
+        start_date = date(start_year, start_month, int(roster.start_day[i]))
+        employees.append((employee_id, start_date, int(roster.base_salary[i])))
+    return employees, salaries, advances
+
+
+def scalar_compute(inputs, month, year):
+    employees, salaries, advances = inputs
+    return [PayrollLedger(employee_id, start_date, base_salary, salaries[employee_id],
+                          advances[employee_id], cache=CarryCache()).remaining_salary_for_month(month, year)
+            for employee_id, start_date, base_salary in employees]
+
+
+def report(title, python_time, numpy_time):
+    print(title)
+    print(f"  python:  {python_time * 1000:9.1f} ms")
+    print(f"  numpy:   {numpy_time * 1000:9.1f} ms")
+    print(f"  speedup: {python_time / numpy_time:9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("db")
+    today = date.today()
+    parser.add_argument("--year", type=int, default=today.year)
+    parser.add_argument("--month", type=int, default=today.month)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.db)
+    python_time, python_rows = best_time(
+        lambda: list(payroll_batch.iter_payroll(connection, args.month, args.year)), args.repeat)
+    numpy_time, numpy_rows = best_time(
+        lambda: list(payroll_numpy.iter_payroll(connection, args.month, args.year)), args.repeat)
+
+    if python_rows != numpy_rows:
+        print("HATA: python ve numpy sonuçları farklı", file=sys.stderr)
+        return 1
+
+    roster = payroll_numpy.load_roster(connection, args.month, args.year)
+    inputs = scalar_inputs(roster)
+    python_compute, python_remaining = best_time(
+        lambda: scalar_compute(inputs, args.month, args.year), args.repeat)
+    numpy_compute, numpy_columns = best_time(
+        lambda: payroll_numpy.roster_balances(roster, args.month, args.year), args.repeat)
+    if python_remaining != numpy_columns["remaining"].tolist():
+        print("HATA: python ve numpy sonuçları farklı", file=sys.stderr)
+        return 1
+
+    print(f"employees: {len(python_rows)}")
+    report("end to end:", python_time, numpy_time)
+    report("calculation only:", python_compute, numpy_compute)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
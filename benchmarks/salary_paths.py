@@ -0,0 +1,269 @@
+"""
+Times the salary hot paths of the application on synthetic databases of several sizes.
+
+    python benchmarks/salary_paths.py [--sizes 100x1,100x10,10000x1,10000x10]
+                                      [--output results.json] [--compare previous.json]
+
+For every size (employees x years of tenure) a database is generated once with
+generate_data.py and cached in --data-dir. The paths are then timed in a separate
+process per size, since the database path is fixed when database.py is imported:
+
+    carried_salary_for_month, remaining_salary_for_month
+        Employee methods as the GUI calls them, with an empty carry cache
+    detail_dialog
+        EmployeeDetailDialog construction until its first tab is built
+    hak_edis
+        loading an employee's ledger and settling it as of --as-of
+
+each for --sample employees spread over the roster. Query counts are those of the
+GUI connection and the background query connections together. Results are saved
+as JSON; --compare prints the median time of every path against an earlier file.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import generate_data  # noqa: E402
+
+
+DEFAULT_SIZES = "100x1,100x10,10000x1,10000x10"
+
+# Slowdown of a path's median time at which --compare reports a regression
+REGRESSION_RATIO = 1.25
+
+
+def parse_sizes(text):
+    sizes = []
+    for size in text.split(","):
+        employees, years = size.lower().split("x")
+        sizes.append((int(employees), int(years)))
+    return sizes
+
+
+def database_for(data_dir, employees, years, as_of, seed):
+    """Path of the generated database of a size, generating it if it is not cached yet"""
+    path = os.path.join(data_dir, f"bench-{employees}x{years}-{as_of:%Y%m%d}-{seed}.db")
+    if not os.path.exists(path):
+        print(f"generating {employees} employees x {years} years ...", file=sys.stderr)
+        partial = path + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        connection = sqlite3.connect(partial)
+        try:
+            generate_data.generate(connection, employees, years, as_of=as_of, seed=seed)
+        finally:
+            connection.close()
+        os.replace(partial, path)
+    return path
+
+
+class QueryCounter:
+    """Counts statements run on the connections it is attached to, from any thread"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def attach(self, connection):
+        connection.set_trace_callback(self._traced)
+        return connection
+
+    def _traced(self, statement):
+        with self._lock:
+            self.count += 1
+
+
+def measure(name, employees, run, counter):
+    """Runs run(employee) for every employee, returning the path's timing summary"""
+    times, queries = [], 0
+    for employee in employees:
+        before = counter.count
+        started = time.perf_counter()
+        run(employee)
+        times.append(time.perf_counter() - started)
+        queries += counter.count - before
+    ordered = sorted(times)
+    return {
+        "path": name,
+        "calls": len(times),
+        "total_ms": sum(times) * 1000,
+        "mean_ms": statistics.mean(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "queries_per_call": queries / len(times),
+    }
+
+
+def run_worker(args):
+    """
+    Benchmarks the database named by OTEL_MAAS_DB, which the parent process sets
+    since the database path is fixed when database.py is first imported
+    """
+    if not os.environ.get("OTEL_MAAS_DB"):
+        sys.exit("--worker needs OTEL_MAAS_DB")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QEventLoop
+    from PyQt5.QtWidgets import QApplication
+
+    import main
+    from payroll import carry_cache
+
+    app = QApplication.instance() or QApplication([])
+    # Databases generated by older revisions are brought up to date like the app does
+    main.initialize_database()
+    counter = QueryCounter()
+    counter.attach(main.conn)
+    thread_connection = main.thread_connection
+
+    def counted_thread_connection():
+        return counter.attach(thread_connection())
+
+    # Background queries look the function up when they run, so they pick this up
+    main.thread_connection = counted_thread_connection
+
+    cursor = main.conn.cursor()
+    cursor.execute("SELECT id, first_name, last_name, start_date, salary FROM employees ORDER BY id")
+    rows = cursor.fetchall()
+    step = max(1, len(rows) // args.sample)
+    employees = [main.Employee.from_row(row) for row in rows[::step][:args.sample]]
+    as_of = date.fromisoformat(args.as_of)
+
+    def carried(employee):
+        carry_cache.invalidate(employee.id)
+        employee.carried_salary_for_month(as_of.month, as_of.year)
+
+    def remaining(employee):
+        carry_cache.invalidate(employee.id)
+        employee.remaining_salary_for_month(as_of.month, as_of.year)
+
+    def detail_dialog(employee):
+        carry_cache.invalidate(employee.id)
+        dialog = main.EmployeeDetailDialog(employee)
+        first_month = dialog.months[dialog.tabs.currentIndex()]
+        while dialog.tab_dirty[first_month]:
+            app.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents, 10)
+        dialog.done(0)
+        dialog.deleteLater()
+
+    def hak_edis(employee):
+        carry_cache.invalidate(employee.id)
+        employee.ledger().settle(as_of)
+
+    results = [
+        measure("carried_salary_for_month", employees, carried, counter),
+        measure("remaining_salary_for_month", employees, remaining, counter),
+        measure("detail_dialog", employees, detail_dialog, counter),
+        measure("hak_edis", employees, hak_edis, counter),
+    ]
+    app.processEvents()
+    json.dump(results, sys.stdout)
+    return 0
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path, results):
+    """Prints every path's median time against an earlier results file; returns the regression count"""
+    with open(previous_path, encoding="utf-8") as handle:
+        previous = json.load(handle)
+    before = {(r["employees"], r["years"], r["path"]): r for r in previous["results"]}
+    print(f"\ncompared with {previous_path} (commit {previous['meta'].get('commit')}):")
+    regressions = 0
+    for result in results:
+        old = before.get((result["employees"], result["years"], result["path"]))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        flag = ""
+        if ratio >= REGRESSION_RATIO:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {result['employees']:>6} x {result['years']:>2}y  {result['path']:<28}"
+              f"{old['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"comma separated EMPLOYEESxYEARS (default {DEFAULT_SIZES})")
+    parser.add_argument("--sample", type=int, default=50, help="employees timed per path")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="date the data ends and the paths are asked about")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "otel_maas_bench"))
+    parser.add_argument("--output", help="results file (default salary_paths-<commit>.json in --data-dir)")
+    parser.add_argument("--compare", metavar="PREVIOUS", help="earlier results file to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        args.as_of = args.as_of.isoformat()
+        return run_worker(args)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    commit = git_commit()
+    results = []
+    for employees, years in args.sizes:
+        path = database_for(args.data_dir, employees, years, args.as_of, args.seed)
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--sample", str(args.sample), "--as-of", args.as_of.isoformat()],
+            cwd=REPO_DIR, capture_output=True, text=True, env=dict(os.environ, OTEL_MAAS_DB=path),
+        )
+        if completed.returncode != 0:
+            print(completed.stderr, file=sys.stderr)
+            return completed.returncode
+        print(f"{employees} employees x {years} years:")
+        for result in json.loads(completed.stdout):
+            result.update(employees=employees, years=years)
+            results.append(result)
+            print(f"  {result['path']:<28}{result['median_ms']:9.2f} ms median"
+                  f"{result['p95_ms']:9.2f} ms p95{result['queries_per_call']:7.1f} queries")
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "as_of": args.as_of.isoformat(),
+            "sample": args.sample,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(args.data_dir, f"salary_paths-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        return 1 if compare(args.compare, results) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Database location, connection settings and the queries on the derived tables
+(monthly_summary, period_closings, employee_search) of the salary tracker. The
+schema itself is created and upgraded by migrations.py.
+
+Kept free of Qt so that headless tools (the payroll commands, the benchmark data
+generator) can create and open databases the same way the application does.
+
+The database file is found, in order, from the OTEL_MAAS_DB environment variable,
+the path in the [database] section of otel_maas.ini next to the application, or
+otel_maas.db next to the application; never from the working directory.
+"""
+import configparser
+import os
+import re
+import sqlite3
+import sys
+
+from query_stats import InstrumentedConnection, query_stats
+
+
+DB_FILE_NAME = "otel_maas.db"
+CONFIG_FILE_NAME = "otel_maas.ini"
+
+# Milliseconds a connection waits for another one's write lock before failing
+BUSY_TIMEOUT = 5000
+# Page cache per connection, in KiB (negative cache_size values are KiB)
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE = 64 * 1024 * 1024
+
+
+def app_dir():
+    """Directory of the executable when frozen by PyInstaller, of the sources otherwise"""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_db_path():
+    path = os.environ.get("OTEL_MAAS_DB")
+    if path:
+        return path
+    config_path = os.path.join(app_dir(), CONFIG_FILE_NAME)
+    config = configparser.ConfigParser()
+    # A missing or unreadable file just leaves the config empty
+    try:
+        config.read(config_path, encoding="utf-8")
+    except configparser.Error:
+        pass
+    path = config.get("database", "path", fallback="").strip()
+    if path:
+        # Relative paths in the config are relative to the config file
+        return os.path.join(app_dir(), os.path.expanduser(path))
+    return os.path.join(app_dir(), DB_FILE_NAME)
+
+
+DB_PATH = resolve_db_path()
+
+
+def connect(path=None):
+    """
+    Opens a connection with the settings every connection of the application uses:
+    WAL journal (readers don't block the writer), synchronous=NORMAL (safe with WAL,
+    no fsync per commit), a larger page cache, memory-mapped reads, enforced foreign
+    keys so ON DELETE CASCADE works, and a busy timeout instead of immediate
+    "database is locked" errors. Its statements are counted by query_stats.
+    """
+    connection = sqlite3.connect(path or DB_PATH, timeout=BUSY_TIMEOUT / 1000, factory=InstrumentedConnection)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT}")
+    connection.set_trace_callback(query_stats.traced)
+    return connection
+
+
+# Employee ids whose monthly_summary rows are filled per statement
+SUMMARY_CHUNK = 1000
+
+
+def fill_by_employee_range(connection, statement, progress=None):
+    """
+    Runs statement, which takes :low and :high employee id parameters, once per
+    range of SUMMARY_CHUNK employee ids, calling progress(done, total) after each
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT MIN(id), MAX(id) FROM employees")
+    first_id, last_id = cursor.fetchone()
+    if first_id is None:
+        return
+    for low in range(first_id, last_id + 1, SUMMARY_CHUNK):
+        high = min(low + SUMMARY_CHUNK - 1, last_id)
+        cursor.execute(statement, {"low": low, "high": high})
+        if progress is not None:
+            progress(high - first_id + 1, last_id - first_id + 1)
+
+
+def fill_monthly_summary(connection, progress=None):
+    """
+    Fills the empty monthly_summary from advances and salaries without committing.
+    Runs one statement per range of employee ids and calls progress(done, total)
+    after each, so that large databases can show how far it is. Months are grouped
+    on the integer period keys (payroll.month_index) of advances and salaries.
+    """
+    fill_by_employee_range(connection, """
+        INSERT INTO monthly_summary (employee_id, year, month, salary, advances_total, advances_count)
+        SELECT employee_id, period / 12, period % 12 + 1, MAX(salary), SUM(advances_total), SUM(advances_count)
+        FROM (
+            SELECT employee_id, period, salary, 0 AS advances_total, 0 AS advances_count
+            FROM salaries
+            WHERE employee_id BETWEEN :low AND :high
+            UNION ALL
+            SELECT employee_id, period, NULL, SUM(amount), COUNT(*)
+            FROM advances
+            WHERE employee_id BETWEEN :low AND :high
+            GROUP BY employee_id, period
+        )
+        WHERE employee_id IN (SELECT id FROM employees)
+        GROUP BY employee_id, period
+    """, progress)
+
+
+def rebuild_monthly_summary(connection, progress=None):
+    """Regenerates monthly_summary from advances and salaries; returns the number of rows"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("DELETE FROM monthly_summary")
+        fill_monthly_summary(connection, progress)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    cursor.execute("SELECT COUNT(*) FROM monthly_summary")
+    return cursor.fetchone()[0]
+
+
+def period_closings(rows):
+    """Maps (employee_id, year, month, balance) period_closings rows to a PayrollLedger's closings"""
+    return {(year, month): balance for _, year, month, balance in rows}
+
+
+def summary_totals(rows):
+    """
+    Splits (employee_id, year, month, salary, advances_total, advances_count)
+    monthly_summary rows into the salaries and advances dicts of a PayrollLedger
+    """
+    salaries, advances = {}, {}
+    for _, year, month, salary, advances_total, advances_count in rows:
+        if salary is not None:
+            salaries[(year, month)] = salary
+        if advances_count:
+            advances[(year, month)] = advances_total
+    return salaries, advances
+
+
+# Letters folded to their base letter in search terms and names, so that "isik",
+# "IŞIK" and "Işık" find each other; ASCII I must not become dotless ı as Python's
+# and ICU's case folding would leave it. The tokenizer folds everything else.
+SEARCH_FOLDS = {
+    "İ": "i", "I": "i", "ı": "i", "Ç": "c", "ç": "c", "Ğ": "g", "ğ": "g", "Ö": "o", "ö": "o",
+    "Ş": "s", "ş": "s", "Ü": "u", "ü": "u", "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u",
+}
+_SEARCH_TABLE = str.maketrans(SEARCH_FOLDS)
+
+
+def search_fold(text):
+    return text.translate(_SEARCH_TABLE)
+
+
+def search_fold_sql(expression):
+    """SQL expression applying search_fold to expression"""
+    for letter, folded in SEARCH_FOLDS.items():
+        expression = f"replace({expression}, '{letter}', '{folded}')"
+    return expression
+
+
+def search_terms(text):
+    """Folded words of a search text"""
+    return re.findall(r"\w+", search_fold(text).casefold())
+
+
+def search_employee_ids(connection, text):
+    """
+    Ids of the employees that have a name starting with every word of text, in
+    any order and case ("meh yıl" finds Mehmet Yılmaz); None for an empty text.
+    Databases without the employee_search index (SQLite without FTS5) are scanned.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT rowid FROM employee_search WHERE employee_search MATCH ?",
+                       (" ".join(f'"{term}"*' for term in terms),))
+        return {row[0] for row in cursor.fetchall()}
+    except sqlite3.OperationalError:
+        # No search index (SQLite without FTS5)
+        cursor.execute("SELECT id, first_name, last_name FROM employees")
+        return {id_ for id_, first_name, last_name in cursor.fetchall()
+                if all(any(word.startswith(term) for word in search_terms(f"{first_name} {last_name}"))
+                       for term in terms)}
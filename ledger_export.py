@@ -0,0 +1,104 @@
+"""
+Yearly ledger export for accounting: every employee's salary, advances, carry and
+remaining salary for each month of a year, one row per employee and month.
+
+    python main.py ledger --year 2026 [--through-month 12] [--format csv|xlsx] [--output FILE]
+
+Rows are computed with the same PayrollLedger rules as remaining_salary_for_month
+while the employees and their monthly_summary rows are read from open cursors,
+and are written as they are produced, so only one employee is in memory at a time.
+XLSX files are written with openpyxl's write-only mode when openpyxl is installed.
+"""
+import argparse
+import sys
+from datetime import date
+
+from payroll import month_index
+from payroll_batch import FIELDS, iter_ledgers, stream, summary_row, write_csv
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+# Column headers of the XLSX sheet, in FIELDS order
+HEADERS = ("ID", "Ad", "Soyad", "Yıl", "Ay", "Maaş", "Hak Edilen", "Avans", "Devreden", "Kalan")
+
+
+def xlsx_available():
+    return Workbook is not None
+
+
+def iter_year(connection, year, through_month=12):
+    """Yields a dict with FIELDS for every employee and month of the year they worked in"""
+    for first_name, last_name, ledger in iter_ledgers(connection, through_month, year, month_index(1, year)):
+        start = ledger.start_date
+        if start.year > year:
+            continue
+        first_month = start.month if start.year == year else 1
+        for month in range(first_month, through_month + 1):
+            yield summary_row(first_name, last_name, ledger, month, year)
+
+
+def write_xlsx(rows, path, year):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(f"Döküm {year}")
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append([row[field] for field in FIELDS])
+    workbook.save(path)
+
+
+def through_month_of(year, today=None):
+    """Last month worth exporting for year: the current month in the current year"""
+    today = today or date.today()
+    if year == today.year:
+        return today.month
+    return 12
+
+
+def export(connection, year, path, file_format="csv", through_month=12):
+    """Writes the year's ledger to path (a file name); returns the number of rows"""
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = counted(iter_year(connection, year, through_month))
+    if file_format == "xlsx":
+        if not xlsx_available():
+            raise RuntimeError("XLSX için openpyxl kurulu olmalıdır")
+        write_xlsx(rows, path, year)
+    else:
+        # utf-8-sig so that Excel shows Turkish characters correctly
+        with open(path, "w", newline="", encoding="utf-8-sig") as out:
+            write_csv(rows, out)
+    return count
+
+
+def main(argv, connection, out=None):
+    parser = argparse.ArgumentParser(prog="main.py ledger",
+                                     description="Yıllık maaş, avans ve devir dökümü")
+    today = date.today()
+    parser.add_argument("--year", type=int, default=today.year)
+    parser.add_argument("--through-month", type=int, choices=range(1, 13), metavar="1-12",
+                        help="dökümün son ayı (varsayılan: bu yıl için içinde bulunulan ay, aksi halde aralık)")
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+    parser.add_argument("--output", help="çıktı dosyası (csv için varsayılan: standart çıktı)")
+    args = parser.parse_args(argv)
+    if args.through_month is None:
+        args.through_month = through_month_of(args.year)
+
+    if args.format == "xlsx":
+        if not xlsx_available():
+            parser.error("--format xlsx için openpyxl kurulu olmalıdır")
+        if not args.output:
+            parser.error("--format xlsx için --output gerekir")
+    if args.output:
+        export(connection, args.year, args.output, args.format, args.through_month)
+        return 0
+    return stream(write_csv, iter_year(connection, args.year, args.through_month), out or sys.stdout)
+
@@ -1,78 +1,261 @@
+from time import perf_counter
+
+# When main.py started running, the reference point of --startup-timing
+_STARTED = perf_counter()
+
 import sys
 import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from weakref import WeakValueDictionary
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
     QPushButton, QDialog, QLabel, QLineEdit, QFormLayout, QDateEdit, QTabWidget, QHeaderView, QGroupBox,
-    QTableView, QAbstractItemView, QTableWidgetSelectionRange, QSystemTrayIcon, QStyle, QMenu, QAction,
-    QMessageBox, QInputDialog
+    QTableView, QAbstractItemView, QSystemTrayIcon, QStyle, QAction,
+    QMessageBox, QInputDialog, QFileDialog, QProgressDialog
+)
+from PyQt5.QtCore import (
+    Qt, QDate, QEvent, QTimer, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
 )
-from PyQt5.QtCore import Qt, QDate, QTimer
-from PyQt5.QtGui import QIcon
 
-# Global database connection
-conn = sqlite3.connect("otel_maas.db")
+from database import (
+    connect, period_closings, rebuild_monthly_summary, search_employee_ids, search_terms, summary_totals,
+)
+from migrations import MigrationError, migrate, print_progress
+from money import format_money, to_kurus
+from payroll import PayDayIndex, PayrollLedger, carry_cache, month_from_index, month_index, visible_months
+from query_stats import query_stats
 
-def initialize_database():
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                salary REAL NOT NULL
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS advances (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                employee_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS salaries (
-                employee_id INTEGER NOT NULL,
-                year INTEGER NOT NULL,
-                month INTEGER NOT NULL,
-                salary REAL NOT NULL,
-                PRIMARY KEY (employee_id, year, month),
-                FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Check if description column exists in advances table, if not add it
+_IMPORTED = perf_counter()
+
+# Global database connection, used on the GUI thread. It is opened by open_connection()
+# once the window is on screen, so importing main.py does not touch the database.
+conn = None
+
+# Connections of the background query threads, one per thread
+_thread_local = threading.local()
+
+
+# Longest the salary check timer waits before re-arming, so clock changes and sleep are caught up
+SALARY_CHECK_MAX_WAIT = timedelta(hours=1)
+# Pause in typing after which the employee search runs
+SEARCH_DELAY_MS = 150
+
+
+def open_connection():
+    """Opens the GUI thread's connection unless it is already open, and returns it"""
+    global conn
+    if conn is None:
+        conn = connect()
+    return conn
+
+
+def thread_connection():
+    """Returns the calling worker thread's own connection, opening it on first use"""
+    connection = getattr(_thread_local, "conn", None)
+    if connection is None:
+        connection = connect()
+        _thread_local.conn = connection
+    return connection
+
+
+class QuerySignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+
+class QueryTask(QRunnable):
+    """
+    Runs fn(connection) on a QThreadPool thread with that thread's own connection and
+    delivers the result through signals on the GUI thread. A cancelled task is taken
+    off the queue if it has not started yet, and its result is dropped otherwise.
+    Its queries count towards the user action that started it.
+    """
+
+    def __init__(self, fn):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.signals = QuerySignals()
+        self.cancelled = False
+        self.action = query_stats.current_action()
+
+    def run(self):
+        if self.cancelled:
+            return
         try:
-            cursor.execute("SELECT description FROM advances LIMIT 1")
-        except sqlite3.OperationalError:
-            # Column doesn't exist, add it
-            cursor.execute("ALTER TABLE advances ADD COLUMN description TEXT")
-            print("Added description column to advances table")
-        
-        conn.commit()
-    except sqlite3.Error as e:
-        QMessageBox.critical(None, "Veritabanı Hatası", 
+            with query_stats.action(self.action, count_call=False):
+                result = self.fn(thread_connection())
+        except Exception as e:
+            self.emit(self.signals.failed, e)
+            return
+        self.emit(self.signals.finished, result)
+
+    def emit(self, signal, value):
+        if self.cancelled:
+            return
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            # The signals object is already gone when the application is shutting down
+            pass
+
+    def cancel(self):
+        self.cancelled = True
+        QThreadPool.globalInstance().tryTake(self)
+        _running_tasks.discard(self)
+
+
+# Tasks are kept referenced here until they report back or are cancelled
+_running_tasks = set()
+
+
+def run_query(fn, on_finished, on_failed=None):
+    """
+    Runs fn(connection) in the background and calls on_finished(result) or
+    on_failed(exception) on the GUI thread. Returns the task so callers can cancel it.
+    """
+    task = QueryTask(fn)
+
+    def finished(result):
+        _running_tasks.discard(task)
+        if not task.cancelled:
+            on_finished(result)
+
+    def failed(error):
+        _running_tasks.discard(task)
+        if not task.cancelled and on_failed is not None:
+            on_failed(error)
+
+    task.signals.finished.connect(finished)
+    task.signals.failed.connect(failed)
+    _running_tasks.add(task)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+
+def show_query_error(parent, error):
+    """Reports an exception raised by a background query"""
+    if isinstance(error, sqlite3.Error):
+        QMessageBox.warning(parent, "Veritabanı Hatası", 
+                            f"Veriler yüklenirken hata oluştu:\n{str(error)}")
+    else:
+        QMessageBox.warning(parent, "Beklenmeyen Hata", 
+                            f"Beklenmeyen bir hata oluştu:\n{str(error)}")
+
+
+def period_date(period, day):
+    """QDate of a day of the month with the given period (payroll.month_index)"""
+    year, month = month_from_index(period)
+    return QDate(year, month, day)
+
+def initialize_database(parent=None):
+    """
+    Opens the database and runs the pending schema migrations, showing their
+    progress if there are any
+    """
+    dialog = None
+
+    def progress(text, done, total):
+        nonlocal dialog
+        if dialog is None:
+            dialog = QProgressDialog(parent)
+            dialog.setWindowTitle("Veritabanı Güncelleniyor")
+            dialog.setCancelButton(None)
+            dialog.setWindowModality(Qt.WindowModal)
+            dialog.setMinimumDuration(0)
+            dialog.setAutoReset(False)
+            dialog.setAutoClose(False)
+        dialog.setLabelText(text)
+        # A maximum of 0 shows a busy indicator
+        dialog.setMaximum(total)
+        dialog.setValue(done)
+        QApplication.processEvents()
+
+    try:
+        migrate(open_connection(), progress)
+    except (sqlite3.Error, MigrationError) as e:
+        QMessageBox.critical(parent, "Veritabanı Hatası", 
                            f"Veritabanı başlatılırken hata oluştu:\n{str(e)}")
         sys.exit(1)
     except Exception as e:
-        QMessageBox.critical(None, "Beklenmeyen Hata", 
+        QMessageBox.critical(parent, "Beklenmeyen Hata", 
                            f"Beklenmeyen bir hata oluştu:\n{str(e)}")
         sys.exit(1)
+    finally:
+        if dialog is not None:
+            dialog.close()
+
+
+def fetch_advances_for_month(connection, employee_id, month, year):
+    """Returns (id, QDate, amount, description) of an employee's advances in the given month"""
+    period = month_index(month, year)
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT id, CAST(substr(date, 9, 2) AS INTEGER), amount, description FROM advances
+        WHERE employee_id = ? AND period = ?
+        ORDER BY date
+    """, (employee_id, period))
+    return [(id_, period_date(period, day), amount, description)
+            for id_, day, amount, description in cursor.fetchall()]
+
+
+def fetch_employee_rows(connection):
+    """
+    Returns (revision, rows): the latest employee revision and the (id, first_name,
+    last_name, start_date, salary) rows of all employees sorted by name. The revision
+    is read first, so changes made while reading are fetched again by the next
+    fetch_employee_changes, never missed.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT COALESCE(MAX(revision), 0) FROM employee_revisions")
+    revision = cursor.fetchone()[0]
+    cursor.execute("SELECT id, first_name, last_name, start_date, salary FROM employees ORDER BY first_name, last_name")
+    return revision, cursor.fetchall()
+
+
+def fetch_employee_changes(connection, since):
+    """
+    Returns (revision, rows, deleted_ids) for the employees inserted, updated or
+    deleted after revision since: the latest revision, the rows of the changed
+    employees and the ids of the deleted ones. Reads only the changed employees.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT r.revision, r.employee_id, e.first_name, e.last_name, e.start_date, e.salary
+        FROM employee_revisions r LEFT JOIN employees e ON e.id = r.employee_id
+        WHERE r.revision > ?
+        ORDER BY r.revision
+    """, (since,))
+    revision, rows, deleted_ids = since, [], []
+    for row_revision, *row_data in cursor.fetchall():
+        revision = row_revision
+        if row_data[1] is None:
+            deleted_ids.append(row_data[0])
+        else:
+            rows.append(tuple(row_data))
+    return revision, rows, deleted_ids
 
 
 class Employee:
+    """
+    An employee row with a date start date and the base salary in kuruş. The
+    employee list hands out one object per id (EmployeeTableModel.employee_at) and
+    patches it when the row changes.
+    """
+
+    # __weakref__ for the employee list's identity map
+    __slots__ = ("id", "first_name", "last_name", "start_date", "salary", "__weakref__")
+
     def get_salary_for_month(self, month, year):
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT salary FROM salaries WHERE employee_id = ? AND year = ? AND month = ?
+                SELECT salary FROM monthly_summary WHERE employee_id = ? AND year = ? AND month = ?
             """, (self.id, year, month))
             row = cursor.fetchone()
-            if row is not None:
+            if row is not None and row[0] is not None:
                 return row[0]
             return self.salary
         except sqlite3.Error as e:
@@ -87,25 +270,25 @@ class Employee:
         self.id = id_
         self.first_name = first_name
         self.last_name = last_name
-        self.start_date = start_date  # QDate
+        self.start_date = start_date  # datetime.date
         self.salary = salary
 
+    @classmethod
+    def from_row(cls, row_data):
+        """Employee of an (id, first_name, last_name, 'yyyy-MM-dd', salary) row"""
+        id_, first_name, last_name, start_date_str, salary = row_data
+        return cls(id_, first_name, last_name, date.fromisoformat(start_date_str), salary)
+
+    def patch(self, row_data):
+        """Takes the values of a newer row of the same employee"""
+        _, self.first_name, self.last_name, start_date_str, self.salary = row_data
+        self.start_date = date.fromisoformat(start_date_str)
+
     def advances_for_month(self, month, year=None):
         if year is None:
             year = QDate.currentDate().year()
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, date, amount, description FROM advances 
-                WHERE employee_id = ? AND strftime('%m', date) = ? AND strftime('%Y', date) = ?
-                ORDER BY date
-            """, (self.id, f"{month:02d}", str(year)))
-            results = cursor.fetchall()
-            advances = []
-            for id_, date_str, amount, description in results:
-                date = QDate.fromString(date_str, "yyyy-MM-dd")
-                advances.append((id_, date, amount, description))
-            return advances
+            return fetch_advances_for_month(conn, self.id, month, year)
         except sqlite3.Error as e:
             QMessageBox.warning(None, "Veritabanı Hatası", 
                               f"Avans bilgisi alınırken hata oluştu:\n{str(e)}")
@@ -121,11 +304,10 @@ class Employee:
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT SUM(amount) FROM advances 
-                WHERE employee_id = ? AND strftime('%m', date) = ? AND strftime('%Y', date) = ?
-            """, (self.id, f"{month:02d}", str(year)))
-            result = cursor.fetchone()[0]
-            return result if result is not None else 0
+                SELECT advances_total FROM monthly_summary WHERE employee_id = ? AND year = ? AND month = ?
+            """, (self.id, year, month))
+            row = cursor.fetchone()
+            return row[0] if row is not None else 0
         except sqlite3.Error as e:
             QMessageBox.warning(None, "Veritabanı Hatası", 
                               f"Toplam avans hesaplanırken hata oluştu:\n{str(e)}")
@@ -135,85 +317,105 @@ class Employee:
                               f"Beklenmeyen bir hata oluştu:\n{str(e)}")
             return 0
 
-    def carried_salary_for_month(self, target_month):
+    def ledger(self):
+        """Loads this employee's salaries and advances into an EmployeeLedger"""
+        return EmployeeLedger(self)
+
+    def carried_salary_for_month(self, target_month, year=None):
         """
-        Calculates the total carried salary for all months before target_month (1-based).
-        Handles year boundaries for December start employees.
+        Calculates the total carried salary for all months before target_month (1-based)
+        of the given year (the current one by default). Use EmployeeLedger directly when
+        asking for several months.
         """
-        # Validate input
-        if target_month < 1 or target_month > 12:
-            return 0
-            
-        if target_month == self.start_date.month() and QDate.currentDate().year() == self.start_date.year():
-            # No carried salary for the starting month in the starting year
-            return 0
-        
-        cumulative_carry = 0
-        start_month = self.start_date.month()
-        start_year = self.start_date.year()
-        current_year = QDate.currentDate().year()
-        
-        # Handle year boundaries
-        if current_year == start_year:
-            # Same year: only consider months from start month to target month
-            for month in range(start_month, target_month):
-                advances = self.total_advances_for_month(month, current_year)
-                if month == self.start_date.month():
-                    # For start month, use prorated salary (divide by 30)
-                    days_in_month = QDate(self.start_date.year(), month, 1).daysInMonth()
-                    days_worked = days_in_month - self.start_date.day() + 1
-                    month_salary = self.get_salary_for_month(month, current_year) / 30 * days_worked
-                else:
-                    # For other months, use full salary
-                    month_salary = self.get_salary_for_month(month, current_year)
-                remaining = month_salary - advances
-                cumulative_carry += remaining
+        return self.ledger().carried_salary_for_month(target_month, year)
+
+    def remaining_salary_for_month(self, month, year=None):
+        return self.ledger().remaining_salary_for_month(month, year)
+
+
+class EmployeeLedger(PayrollLedger):
+    """
+    PayrollLedger of an Employee, read from the database.
+
+    All salary overrides and the advance sums per month are read from the employee's
+    monthly_summary rows in one query and the period closings in another; month,
+    carry and remaining calculations are then answered from memory instead of
+    issuing a query per month. Months default to the current year.
+    """
+
+    def __init__(self, employee, data=None):
+        super().__init__(employee.id, employee.start_date, employee.salary)
+        self.employee = employee
+        if data is None:
+            self.reload()
         else:
-            # Different year: need to handle year boundary
-            # First, calculate carried salary from previous year (start month to December)
-            for month in range(start_month, 13):
-                advances = self.total_advances_for_month(month, start_year)
-                if month == self.start_date.month():
-                    # For start month, use prorated salary (divide by 30)
-                    days_in_month = QDate(self.start_date.year(), month, 1).daysInMonth()
-                    days_worked = days_in_month - self.start_date.day() + 1
-                    month_salary = self.get_salary_for_month(month, start_year) / 30 * days_worked
-                else:
-                    # For other months, use full salary
-                    month_salary = self.get_salary_for_month(month, start_year)
-                remaining = month_salary - advances
-                cumulative_carry += remaining
-            
-            # Then add carried salary from current year (January to target month - 1)
-            for month in range(1, target_month):
-                advances = self.total_advances_for_month(month, current_year)
-                month_salary = self.get_salary_for_month(month, current_year)
-                remaining = month_salary - advances
-                cumulative_carry += remaining
-        
-        return cumulative_carry
+            self.apply(data)
 
-    def remaining_salary_for_month(self, month):
-        year = QDate.currentDate().year()
-        total_advance = self.total_advances_for_month(month, year)
-
-        # Check if this is the actual start month (both month and year must match)
-        if month == self.start_date.month() and year == self.start_date.year():
-            current_salary = self.get_salary_for_month(month, year)
-            if self.start_date.day() == 1:
-                # Full salary for starting on the first day
-                return current_salary - total_advance
-            else:
-                # Prorated salary for starting later in the month (divide by 30)
-                days_in_month = QDate(self.start_date.year(), month, 1).daysInMonth()
-                days_worked = days_in_month - self.start_date.day() + 1
-                prorated_salary = current_salary / 30 * days_worked
-                return prorated_salary - total_advance
+    @staticmethod
+    def fetch(employee_id, connection):
+        """
+        Reads an employee's salary overrides, per-month advance sums and period
+        closings. Takes the connection explicitly so it can run on a background
+        query thread.
+        """
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT employee_id, year, month, salary, advances_total, advances_count FROM monthly_summary
+            WHERE employee_id = ?
+        """, (employee_id,))
+        salaries, advances = summary_totals(cursor.fetchall())
+        cursor.execute("SELECT employee_id, year, month, balance FROM period_closings WHERE employee_id = ?",
+                       (employee_id,))
+        return salaries, advances, period_closings(cursor.fetchall())
+
+    def apply(self, data):
+        """
+        Replaces the totals with data returned by fetch. Cached balances summed from
+        other totals, e.g. before another connection (a second instance,
+        import-advances, close_periods) changed rows, are dropped by the carry cache
+        from the first month that differs when they are next looked up.
+        """
+        self.salaries, self.advances, closings = data
+        self.set_closings(closings)
 
-        # Diğer aylarda tam maaş + taşınan maaş
-        current_salary = self.get_salary_for_month(month, year)
-        carried = self.carried_salary_for_month(month)
-        return carried + current_salary - total_advance
+    def reload(self):
+        """Re-reads the employee's salaries and advances, e.g. after a write"""
+        try:
+            self.apply(self.fetch(self.employee.id, conn))
+        except sqlite3.Error as e:
+            QMessageBox.warning(None, "Veritabanı Hatası", 
+                              f"Maaş ve avans bilgileri alınırken hata oluştu:\n{str(e)}")
+        except Exception as e:
+            QMessageBox.warning(None, "Beklenmeyen Hata", 
+                              f"Beklenmeyen bir hata oluştu:\n{str(e)}")
+
+    def total_advances_for_month(self, month, year=None):
+        if year is None:
+            year = QDate.currentDate().year()
+        return super().total_advances_for_month(month, year)
+
+    def carried_salary_for_month(self, target_month, year=None):
+        if year is None:
+            year = QDate.currentDate().year()
+        return super().carried_salary_for_month(target_month, year)
+
+    def remaining_salary_for_month(self, month, year=None):
+        if year is None:
+            year = QDate.currentDate().year()
+        return super().remaining_salary_for_month(month, year)
+
+    def invalidate(self, month=None, year=None, data=None):
+        """
+        Call after writing salaries or advances of the given month: reloads the totals
+        (or applies data already fetched in the background) and drops the cached
+        balances from that month onwards, including any summed from the old totals
+        while the data was being fetched.
+        """
+        if data is None:
+            self.reload()
+        else:
+            self.apply(data)
+        super().invalidate(month, year)
 
 
 class AddEmployeeDialog(QDialog):
@@ -249,7 +451,7 @@ class AddEmployeeDialog(QDialog):
 
     def get_employee_data(self):
         try:
-            salary = float(self.salary_edit.text())
+            salary = to_kurus(self.salary_edit.text())
             if salary < 0:
                 salary = 0
         except ValueError:
@@ -304,7 +506,7 @@ class AddAdvanceDialog(QDialog):
 
     def get_advance_data(self):
         try:
-            amount = float(self.amount_edit.text())
+            amount = to_kurus(self.amount_edit.text())
             if amount < 0:
                 amount = 0
         except ValueError:
@@ -317,28 +519,149 @@ class EmployeeDetailDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Çalışan Detayı")
         self.employee = employee
+        # Loaded in the background together with the first tab
+        self.ledger = None
+        # Background queries in flight by purpose ("tab", "refresh")
+        self.tasks = {}
+        # Months written to whose refresh has not arrived yet
+        self.pending_changes = set()
         self.resize(500, 400)
         layout = QVBoxLayout()
 
         self.tabs = QTabWidget()
-        self.start_month = self.employee.start_date.month()
-        self.start_year = self.employee.start_date.year()
+        self.start_month = self.employee.start_date.month
+        self.start_year = self.employee.start_date.year
         self.current_year = QDate.currentDate().year()
         
-        # Determine which months to show based on year
-        if self.current_year == self.start_year:
-            # First year: show from start month to December
-            months_to_show = range(self.start_month, 13)
-        else:
-            # Subsequent years: show all 12 months
-            months_to_show = range(1, 13)
-        
-        for month in months_to_show:
-            self.tabs.addTab(self.create_month_tab(month), f"{month}. Ay")
+        # First year: from start month to December, subsequent years: all 12 months
+        self.months = visible_months(self.employee.start_date, QDate.currentDate().toPyDate())
+
+        # Tabs are built lazily: every page starts empty and gets its content the first
+        # time it is shown, and again only if its data changed since it was built
+        self.tab_dirty = {}
+        # Labels and tables of built tabs, so writes can update them in place
+        self.month_widgets = {}
+        for month in self.months:
+            page = QWidget()
+            page_layout = QVBoxLayout()
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page.setLayout(page_layout)
+            self.tabs.addTab(page, f"{month}. Ay")
+            self.tab_dirty[month] = True
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.on_tab_changed(self.tabs.currentIndex())
+
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
-    def create_month_tab(self, month):
+    @query_stats.tracked("Sekme yükleme")
+    def on_tab_changed(self, index):
+        if 0 <= index < len(self.months):
+            month = self.months[index]
+            if self.tab_dirty[month]:
+                self.request_tab(month)
+
+    def start_task(self, name, fn, on_finished):
+        """Runs fn(connection) in the background, cancelling the previous task of the same name"""
+        self.cancel_task(name)
+
+        def finished(result):
+            self.tasks.pop(name, None)
+            on_finished(result)
+
+        def failed(error):
+            self.tasks.pop(name, None)
+            show_query_error(self, error)
+
+        self.tasks[name] = run_query(fn, finished, failed)
+
+    def cancel_task(self, name):
+        task = self.tasks.pop(name, None)
+        if task is not None:
+            task.cancel()
+
+    def done(self, result):
+        # Results of stale requests must not reach the widgets of a closed dialog
+        for name in list(self.tasks):
+            self.cancel_task(name)
+        if self.pending_changes:
+            # The refresh after a write never finished; balances summed meanwhile from
+            # the ledger's old totals must not outlive the dialog
+            year, month = min(self.pending_changes)
+            carry_cache.invalidate(self.employee.id, month, year)
+        super().done(result)
+
+    def request_tab(self, month):
+        """
+        Shows a placeholder on the month's tab and loads its data in the background;
+        the tab is built when the data arrives. Switching to another tab cancels it.
+        """
+        self.set_page_content(month, QLabel("Yükleniyor..."))
+        self.month_widgets.pop(month, None)
+        employee_id = self.employee.id
+        year = QDate.currentDate().year()
+        need_ledger = self.ledger is None
+
+        def load(connection):
+            ledger_data = EmployeeLedger.fetch(employee_id, connection) if need_ledger else None
+            return ledger_data, fetch_advances_for_month(connection, employee_id, month, year)
+
+        def loaded(result):
+            ledger_data, advances = result
+            if ledger_data is not None:
+                self.ledger = EmployeeLedger(self.employee, ledger_data)
+            self.build_tab(month, advances)
+
+        self.start_task("tab", load, loaded)
+
+    def set_page_content(self, month, content):
+        """Replaces whatever a month's tab page shows with content"""
+        page = self.tabs.widget(self.months.index(month))
+        page_layout = page.layout()
+        while page_layout.count():
+            old_content = page_layout.takeAt(0).widget()
+            if old_content is not None:
+                old_content.setParent(None)
+                old_content.deleteLater()
+        if isinstance(content, QLabel):
+            content.setAlignment(Qt.AlignCenter)
+        page_layout.addWidget(content)
+
+    def build_tab(self, month, advances):
+        """(Re)builds the content of a month's tab page from the month's advances"""
+        self.set_page_content(month, self.create_month_tab(month, advances))
+        self.tab_dirty[month] = False
+
+    @query_stats.tracked("Sekme yenileme")
+    def reload_after_write(self, changed_months):
+        """
+        Call right after committing a write. Drops the cached balances from the
+        earliest changed month at once, then re-reads the ledger and the advances of
+        the changed months in the background and updates the built tabs in place.
+        """
+        employee_id = self.employee.id
+        changed_from = min(changed_months)
+        carry_cache.invalidate(employee_id, changed_from[1], changed_from[0])
+        self.pending_changes |= changed_months
+        changed_months = set(self.pending_changes)
+        year = QDate.currentDate().year()
+        table_months = [m for y, m in changed_months if y == year and m in self.month_widgets]
+
+        def load(connection):
+            return (EmployeeLedger.fetch(employee_id, connection),
+                    {m: fetch_advances_for_month(connection, employee_id, m, year) for m in table_months})
+
+        def loaded(result):
+            ledger_data, advances_by_month = result
+            self.pending_changes.clear()
+            changed_from = min(changed_months)
+            self.ledger.invalidate(changed_from[1], changed_from[0], ledger_data)
+            self.update_months(changed_months, advances_by_month)
+
+        # A newer refresh covers the months of the one it replaces
+        self.start_task("refresh", load, loaded)
+
+    def create_month_tab(self, month, advances):
         tab = QWidget()
         vbox = QVBoxLayout()
 
@@ -347,37 +670,40 @@ class EmployeeDetailDialog(QDialog):
         info_layout = QFormLayout()
         info_layout.addRow("Ad:", QLabel(self.employee.first_name))
         info_layout.addRow("Soyad:", QLabel(self.employee.last_name))
-        info_layout.addRow("Başlama Tarihi:", QLabel(self.employee.start_date.toString("dd.MM.yyyy")))
-        current_salary = self.employee.get_salary_for_month(month, QDate.currentDate().year())
-        info_layout.addRow("Maaş:", QLabel(f"{current_salary:.2f}"))
+        info_layout.addRow("Başlama Tarihi:", QLabel(self.employee.start_date.strftime("%d.%m.%Y")))
+        current_salary = self.ledger.get_salary_for_month(month, QDate.currentDate().year())
+        salary_label = QLabel(format_money(current_salary))
+        info_layout.addRow("Maaş:", salary_label)
         info_group.setLayout(info_layout)
         vbox.addWidget(info_group)
 
         # Advances summary
         year = QDate.currentDate().year()
-        current_salary = self.employee.get_salary_for_month(month, year)
-        carried = self.employee.carried_salary_for_month(month)
-        advances_sum = self.employee.total_advances_for_month(month)
+        current_salary = self.ledger.get_salary_for_month(month, year)
+        advances_sum = self.ledger.total_advances_for_month(month)
         
         # Use the proper remaining salary calculation
-        remaining = self.employee.remaining_salary_for_month(month)
+        remaining = self.ledger.remaining_salary_for_month(month)
 
         summary_group = QGroupBox("Avans Bilgisi")
         summary_layout = QFormLayout()
-        summary_layout.addRow("Toplam Avans:", QLabel(f"{advances_sum:.2f}"))
-        summary_layout.addRow("Kalan Maaş:", QLabel(f"{remaining:.2f}"))
+        advances_label = QLabel(format_money(advances_sum))
+        remaining_label = QLabel(format_money(remaining))
+        summary_layout.addRow("Toplam Avans:", advances_label)
+        summary_layout.addRow("Kalan Maaş:", remaining_label)
         summary_group.setLayout(summary_layout)
         vbox.addWidget(summary_group)
 
         # Maaş güncelleme arayüzü
         salary_edit = QLineEdit()
         salary_edit.setPlaceholderText("Yeni maaş girin")
-        salary_edit.setText(str(current_salary))
+        salary_edit.setText(format_money(current_salary))
         update_salary_btn = QPushButton("Maaşı Güncelle")
 
+        @query_stats.tracked("Maaş güncelleme")
         def update_salary():
             try:
-                new_salary = float(salary_edit.text())
+                new_salary = to_kurus(salary_edit.text())
                 if new_salary < 0:
                     QMessageBox.warning(self, "Geçersiz Değer", "Maaş negatif olamaz!")
                     return
@@ -390,11 +716,11 @@ class EmployeeDetailDialog(QDialog):
                 year = QDate.currentDate().year()
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT OR REPLACE INTO salaries (employee_id, year, month, salary)
-                    VALUES (?, ?, ?, ?)
-                """, (self.employee.id, year, month, new_salary))
+                    INSERT OR REPLACE INTO salaries (employee_id, period, salary)
+                    VALUES (?, ?, ?)
+                """, (self.employee.id, month_index(month, year), new_salary))
                 conn.commit()
-                self.refresh_tab(month)
+                self.reload_after_write({(year, month)})
                 QMessageBox.information(self, "Başarılı", f"{month}. ay {year} maaşı başarıyla güncellendi!")
             except sqlite3.Error as e:
                 QMessageBox.critical(self, "Veritabanı Hatası", 
@@ -412,22 +738,23 @@ class EmployeeDetailDialog(QDialog):
         vbox.addLayout(salary_layout)
 
         # Advances table
-        year = QDate.currentDate().year()
-        advances = self.employee.advances_for_month(month, year)
-        self.advance_table = QTableWidget(len(advances), 3)
+        self.advance_table = QTableWidget(0, 3)
         self.advance_table.setHorizontalHeaderLabels(["Tarih", "Tutar", "Açıklama"])
-        for row, (adv_id, date, amount, description) in enumerate(advances):
-            date_item = QTableWidgetItem(date.toString("dd.MM.yyyy"))
-            date_item.setData(Qt.UserRole, adv_id)  # Store advance ID for robust deletion
-            self.advance_table.setItem(row, 0, date_item)
-            self.advance_table.setItem(row, 1, QTableWidgetItem(f"{amount:.2f}"))
-            self.advance_table.setItem(row, 2, QTableWidgetItem(description or ""))
+        self.fill_advance_table(self.advance_table, advances)
         self.advance_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.advance_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.advance_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         vbox.addWidget(QLabel("Avanslar:"))
         vbox.addWidget(self.advance_table)
 
+        self.month_widgets[month] = {
+            "salary": salary_label,
+            "salary_edit": salary_edit,
+            "advances": advances_label,
+            "remaining": remaining_label,
+            "table": self.advance_table,
+        }
+
         # Buttons for advances
         btn_layout = QHBoxLayout()
         add_btn = QPushButton("Avans Ekle")
@@ -455,15 +782,18 @@ class EmployeeDetailDialog(QDialog):
         vbox.addWidget(hak_edis_btn)
 
         # Connect add_btn to add advance dialog and refresh tab
+        @query_stats.tracked("Avans ekleme")
         def add_advance():
             dlg = AddAdvanceDialog(self)
             if dlg.exec_() == QDialog.Accepted:
-                date, amount, description = dlg.get_advance_data()
+                advance_date, amount, description = dlg.get_advance_data()
                 if amount > 0:
                     try:
                         cursor = conn.cursor()
                         remaining_payment = amount
                         allocations = []
+                        # Months written to; carry changes from the earliest one on
+                        changed_months = {(advance_date.year(), advance_date.month())}
                         
                         # Check for previous month's remaining salary
                         previous_month_remaining = self.calculate_previous_month_remaining(month)
@@ -482,30 +812,36 @@ class EmployeeDetailDialog(QDialog):
                             # Use a date from the previous month for proper allocation
                             previous_month_date = QDate(previous_year, previous_month, 1)
                             cursor.execute(
-                                "INSERT INTO advances (employee_id, date, amount, description) VALUES (?, ?, ?, ?)",
-                                (self.employee.id, previous_month_date.toString("yyyy-MM-dd"), amount_for_previous, 
+                                "INSERT INTO advances (employee_id, date, period, amount, description) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                (self.employee.id, previous_month_date.toString("yyyy-MM-dd"),
+                                 month_index(previous_month, previous_year), amount_for_previous, 
                                  f"{description} (Gecikmiş ödeme - {previous_month}. ay kalan maaş)")
                             )
-                            allocations.append(f"Önceki ay ({previous_month}. ay) kalan maaş: {amount_for_previous:.2f} TL")
+                            allocations.append(f"Önceki ay ({previous_month}. ay) kalan maaş: {format_money(amount_for_previous)} TL")
                             remaining_payment -= amount_for_previous
+                            changed_months.add((previous_year, previous_month))
                         
                         # Then, allocate to current month
                         if remaining_payment > 0:
                             cursor.execute(
-                                "INSERT INTO advances (employee_id, date, amount, description) VALUES (?, ?, ?, ?)",
-                                (self.employee.id, date.toString("yyyy-MM-dd"), remaining_payment, 
+                                "INSERT INTO advances (employee_id, date, period, amount, description) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                (self.employee.id, advance_date.toString("yyyy-MM-dd"),
+                                 month_index(advance_date.month(), advance_date.year()),
+                                 remaining_payment, 
                                  f"{description} ({month}. ay maaş)")
                             )
-                            allocations.append(f"{month}. ay maaş: {remaining_payment:.2f} TL")
+                            allocations.append(f"{month}. ay maaş: {format_money(remaining_payment)} TL")
                         
                         conn.commit()
-                        self.refresh_all_tabs()
+                        self.reload_after_write(changed_months)
                         
                         # Show success message with breakdown
                         if len(allocations) > 1:
                             breakdown_text = "\n".join(allocations)
                             QMessageBox.information(self, "Başarılı", 
-                                                  f"Toplam {amount:.2f} TL ödeme başarıyla yapıldı!\n\n"
+                                                  f"Toplam {format_money(amount)} TL ödeme başarıyla yapıldı!\n\n"
                                                   f"Dağılım:\n{breakdown_text}\n\n"
                                                   f"Not: Önceki ay kalan maaş ödendi ve kalan maaş 0'a düşürüldü.")
                         else:
@@ -523,6 +859,7 @@ class EmployeeDetailDialog(QDialog):
         add_btn.clicked.connect(add_advance)
 
         # Implement "Sil" button functionality
+        @query_stats.tracked("Avans silme")
         def delete_advance():
             # Always get the advances table from the current tab
             current_tab = self.tabs.currentWidget()
@@ -568,7 +905,7 @@ class EmployeeDetailDialog(QDialog):
                     else:
                         debug_info.append(f"Row {index}: No item in column 0!")
                 conn.commit()
-                self.refresh_all_tabs()
+                self.reload_after_write({(QDate.currentDate().year(), month)})
                 if deleted_count > 0:
                     QMessageBox.information(self, "Başarılı", f"{deleted_count} avans başarıyla silindi!\n{chr(10).join(debug_info)}")
                 else:
@@ -583,6 +920,7 @@ class EmployeeDetailDialog(QDialog):
         delete_btn.clicked.connect(delete_advance)
 
         # Implement "Güncelle" button functionality
+        @query_stats.tracked("Avans güncelleme")
         def update_advance():
             # Always get the advances table from the current tab
             current_tab = self.tabs.currentWidget()
@@ -621,20 +959,20 @@ class EmployeeDetailDialog(QDialog):
             try:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT date, amount, description FROM advances WHERE id = ?
+                    SELECT period, CAST(substr(date, 9, 2) AS INTEGER), amount, description FROM advances WHERE id = ?
                 """, (adv_id,))
                 result = cursor.fetchone()
                 if result is None:
                     QMessageBox.warning(self, "Veri Hatası", "Avans veritabanında bulunamadı!")
                     return
                     
-                old_date_str, old_amount, old_description = result
-                old_date = QDate.fromString(old_date_str, "yyyy-MM-dd")
+                old_period, old_day, old_amount, old_description = result
+                old_date = period_date(old_period, old_day)
 
                 dlg = AddAdvanceDialog(self)
                 dlg.setWindowTitle("Avans Güncelle")
                 dlg.date_edit.setDate(old_date)
-                dlg.amount_edit.setText(f"{old_amount:.2f}")
+                dlg.amount_edit.setText(format_money(old_amount))
                 dlg.description_edit.setText(old_description or "")
 
                 if dlg.exec_() == QDialog.Accepted:
@@ -650,13 +988,14 @@ class EmployeeDetailDialog(QDialog):
                         try:
                             cursor = conn.cursor()
                             cursor.execute("""
-                                UPDATE advances SET date = ?, amount = ?, description = ?
+                                UPDATE advances SET date = ?, period = ?, amount = ?, description = ?
                                 WHERE id = ?
                             """, (
-                                new_date.toString("yyyy-MM-dd"), new_amount, new_description, adv_id
+                                new_date.toString("yyyy-MM-dd"), month_index(new_date.month(), new_date.year()),
+                                new_amount, new_description, adv_id
                             ))
                             conn.commit()
-                            self.refresh_all_tabs()
+                            self.reload_after_write({(current_year, month)})
                             QMessageBox.information(self, "Başarılı", "Avans başarıyla güncellendi!")
                         except sqlite3.Error as e:
                             QMessageBox.critical(self, "Veritabanı Hatası", 
@@ -676,6 +1015,7 @@ class EmployeeDetailDialog(QDialog):
         update_btn.clicked.connect(update_advance)
 
         # Hak ediş functionality
+        @query_stats.tracked("Hak ediş")
         def show_hak_edis():
             # Ask for termination date
             term_date, ok = QInputDialog.getText(self, "Hak Ediş", "Çıkış (işten ayrılma) tarihini girin (GG.AA.YYYY):")
@@ -685,87 +1025,29 @@ class EmployeeDetailDialog(QDialog):
                 # Robust manual parsing to avoid QDate.fromString locale issues
                 day, month, year = map(int, term_date.split('.'))
                 term_date_q = QDate(year, month, day)
-                if not term_date_q.isValid() or term_date_q < self.employee.start_date:
+                if not term_date_q.isValid() or term_date_q.toPyDate() < self.employee.start_date:
                     QMessageBox.warning(self, "Geçersiz Tarih", "Geçerli bir çıkış tarihi girin!")
                     return
             except Exception:
                 QMessageBox.warning(self, "Geçersiz Tarih", "Geçerli bir çıkış tarihi girin!")
                 return
 
-            start = self.employee.start_date
-            end = term_date_q
-            print(f"[DEBUG] start: {start.toString('yyyy-MM-dd')}, end: {end.toString('yyyy-MM-dd')}")
-            periods = []
-            period_start = QDate(start)
-            total_salary = 0
+            settlement = self.ledger.settle(term_date_q.toPyDate())
             breakdown = []
-            start_day = start.day()
-            max_periods = 100
-            period_count = 0
-            # 1. Full periods: from start_day to (start_day-1) of next month
-            while True:
-                if period_count > max_periods:
-                    QMessageBox.critical(self, "Hak Ediş Hatası", "Çok fazla dönem tespit edildi. Tarih girişinizi kontrol edin veya geliştiriciye başvurun.")
-                    return
-                # Calculate period_end
-                next_month = period_start.month() + 1
-                next_year = period_start.year()
-                if next_month > 12:
-                    next_month = 1
-                    next_year += 1
-                # The day before start_day in next month
-                if start_day == 1:
-                    # Last day of the current month
-                    period_end = QDate(period_start.year(), period_start.month(), 1).addMonths(1).addDays(-1)
-                else:
-                    period_end = QDate(next_year, next_month, start_day - 1)
-                print(f"[DEBUG] period_start: {period_start.toString('yyyy-MM-dd')}, period_end: {period_end.toString('yyyy-MM-dd')}")
-                if period_end > end:
-                    break
-                # Find salary for this period (use salary valid at period_start)
-                salary = self.employee.get_salary_for_month(period_start.month(), period_start.year())
-                periods.append((period_start, period_end, period_start.daysTo(period_end) + 1, salary))
-                total_salary += salary
-                breakdown.append(f"{period_start.toString('dd.MM.yyyy')} - {period_end.toString('dd.MM.yyyy')}: {salary:.2f} TL ({period_start.daysTo(period_end) + 1} gün, tam maaş)")
-                # Next period starts the day after period_end
-                new_period_start = period_end.addDays(1)
-                print(f"[DEBUG] new_period_start: {new_period_start.toString('yyyy-MM-dd')}")
-                if new_period_start <= period_start:
-                    print(f"[ERROR] new_period_start <= period_start! period_start: {period_start.toString('yyyy-MM-dd')}, new_period_start: {new_period_start.toString('yyyy-MM-dd')}")
-                    QMessageBox.critical(self, "Hak Ediş Hatası", "Dönem hesaplamasında hata oluştu. Lütfen tarihleri kontrol edin.")
-                    return
-                period_start = new_period_start
-                period_count += 1
-            # 2. Last (possibly partial) period
-            if period_start <= end:
-                days = period_start.daysTo(end) + 1
-                salary = self.employee.get_salary_for_month(period_start.month(), period_start.year())
-                prorated = salary / 30 * days
-                periods.append((period_start, end, days, prorated))
-                total_salary += prorated
-                breakdown.append(f"{period_start.toString('dd.MM.yyyy')} - {end.toString('dd.MM.yyyy')}: {prorated:.2f} TL ({days} gün, 30 gün üzerinden)")
-            if period_count > 50:
-                breakdown.append("\nUYARI: Çok fazla dönem bulundu. Tarih girişinizi kontrol edin!")
-            # 3. Subtract advances for all months up to and including termination date
-            advances_total = 0
-            advances_breakdown = []
-            current = QDate(start)
-            while current.year() < end.year() or (current.year() == end.year() and current.month() <= end.month()):
-                adv = self.employee.total_advances_for_month(current.month(), current.year())
-                advances_total += adv
-                if adv > 0:
-                    advances_breakdown.append(f"{current.month()}.{current.year()}: -{adv:.2f} TL avans")
-                # Move to next month
-                if current.month() == 12:
-                    current = QDate(current.year() + 1, 1, 1)
+            for period in settlement.periods:
+                span = f"{period.start:%d.%m.%Y} - {period.end:%d.%m.%Y}"
+                if period.full:
+                    breakdown.append(f"{span}: {format_money(period.amount)} TL ({period.days} gün, tam maaş)")
                 else:
-                    current = QDate(current.year(), current.month() + 1, 1)
-            net = total_salary - advances_total
+                    breakdown.append(f"{span}: {format_money(period.amount)} TL ({period.days} gün, 30 gün üzerinden)")
+            advances_breakdown = [f"{adv_month}.{adv_year}: -{format_money(total)} TL avans"
+                                  for adv_year, adv_month, total in settlement.advances]
+            net = settlement.net
             # 4. Show breakdown
             msg = QMessageBox(self)
             msg.setWindowTitle("Hak Ediş Hesaplama")
             msg.setIcon(QMessageBox.Information)
-            msg.setText(f"Toplam Hak Ediş: {net:.2f} TL")
+            msg.setText(f"Toplam Hak Ediş: {format_money(net)} TL")
             details = "\n".join(breakdown)
             if advances_breakdown:
                 details += "\n\nAvanslar:\n" + "\n".join(advances_breakdown)
@@ -780,78 +1062,337 @@ class EmployeeDetailDialog(QDialog):
         return tab
 
     def refresh_tab(self, month):
-        index = month - self.start_month
-        if 0 <= index < self.tabs.count():
-            self.tabs.removeTab(index)
-            self.tabs.insertTab(index, self.create_month_tab(month), f"{month}. Ay")
+        if month not in self.tab_dirty:
+            return
+        self.tab_dirty[month] = True
+        index = self.months.index(month)
+        if self.tabs.currentIndex() == index:
+            self.request_tab(month)
+        else:
+            # Switching tabs rebuilds it through on_tab_changed
             self.tabs.setCurrentIndex(index)
     
+    def fill_advance_table(self, table, advances):
+        """Writes the month's advances into the table, reusing its existing rows and items"""
+        table.setRowCount(len(advances))
+        for row, (adv_id, advance_date, amount, description) in enumerate(advances):
+            texts = (advance_date.toString("dd.MM.yyyy"), format_money(amount), description or "")
+            for column, text in enumerate(texts):
+                item = table.item(row, column)
+                if item is None:
+                    table.setItem(row, column, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+            table.item(row, 0).setData(Qt.UserRole, adv_id)  # Store advance ID for robust deletion
+
+    def update_months(self, changed_months, advances_by_month):
+        """
+        Updates built tabs in place after a write. changed_months holds the (year, month)
+        pairs whose salary or advances were written: those tabs get their labels and
+        advance table (from advances_by_month) refreshed, later tabs only their Kalan
+        Maaş since the carry changed. Earlier tabs and tabs that are not built yet are
+        left alone.
+        """
+        year = QDate.currentDate().year()
+        earliest = min(changed_months)
+        for month in self.months:
+            widgets = self.month_widgets.get(month)
+            if widgets is None or self.tab_dirty[month] or (year, month) < earliest:
+                continue
+            if (year, month) in changed_months:
+                if month not in advances_by_month:
+                    # Built while the refresh was loading; rebuild it with fresh rows
+                    self.tab_dirty[month] = True
+                    if self.tabs.currentIndex() == self.months.index(month):
+                        self.request_tab(month)
+                    continue
+                salary = self.ledger.get_salary_for_month(month, year)
+                widgets["salary"].setText(format_money(salary))
+                widgets["salary_edit"].setText(format_money(salary))
+                widgets["advances"].setText(format_money(self.ledger.total_advances_for_month(month, year)))
+                self.fill_advance_table(widgets["table"], advances_by_month[month])
+            widgets["remaining"].setText(format_money(self.ledger.remaining_salary_for_month(month, year)))
+
     def calculate_previous_month_remaining(self, current_month):
         """Calculate remaining salary from the previous month"""
-        if current_month == 1:
-            # January - check December of previous year
-            previous_month = 12
-            previous_year = QDate.currentDate().year() - 1
-        else:
-            # Other months - check previous month of current year
-            previous_month = current_month - 1
-            previous_year = QDate.currentDate().year()
-        
-        # Check if employee was working in the previous month
-        if previous_year < self.employee.start_date.year():
-            return 0
-        if previous_year == self.employee.start_date.year() and previous_month < self.employee.start_date.month():
-            return 0
-        
-        # Calculate remaining salary for previous month
-        if previous_month == self.employee.start_date.month() and previous_year == self.employee.start_date.year():
-            # Start month - use prorated salary
-            days_in_month = QDate(previous_year, previous_month, 1).daysInMonth()
-            proportion = (days_in_month - self.employee.start_date.day() + 1) / days_in_month
-            month_salary = self.employee.get_salary_for_month(previous_month, previous_year) * proportion
-        else:
-            # Regular month - use full salary
-            month_salary = self.employee.get_salary_for_month(previous_month, previous_year)
-        
-        advances = self.employee.total_advances_for_month(previous_month, previous_year)
-        remaining = month_salary - advances
-        
-        return max(0, remaining)
+        previous_year, previous_month = month_from_index(
+            month_index(current_month, QDate.currentDate().year()) - 1)
+        # Nothing is owed for months before the employee started
+        return self.ledger.unpaid_salary_for_month(previous_month, previous_year)
 
+    @query_stats.tracked("Sekme yenileme")
     def refresh_all_tabs(self):
         """Refresh all tabs to update kalan maaş calculations"""
-        current_index = self.tabs.currentIndex()
-        
-        # Store the current tab index
-        start_month = self.start_month
-        current_year = QDate.currentDate().year()
-        
-        # Determine which months to show based on year
-        if current_year == self.start_year:
-            # First year: show from start month to December
-            months_to_show = range(self.start_month, 13)
+        # Only the visible tab is rebuilt now, the others when they are shown again
+        for month in self.months:
+            self.tab_dirty[month] = True
+        self.on_tab_changed(self.tabs.currentIndex())
+
+
+class EmployeeTableModel(QAbstractTableModel):
+    """
+    Employee list shown in the main window.
+
+    Rows are kept as plain (id, first_name, last_name, start_date, salary) tuples
+    sorted by name, with a parallel list of sort keys for bisecting. Employee objects
+    are only created for the rows that are actually used, one per id while anything
+    holds it (an identity map), and are patched in place when their row changes.
+    Single edits emit targeted row signals instead of resetting the whole model.
+    While a search is active only the employees it found are shown; edits then
+    reset the model.
+    """
+
+    HEADERS = ("Ad", "Soyad")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._keys = []  # (first_name, last_name) per row, same order as _rows
+        self._match_ids = None  # ids found by the search, None shows everyone
+        self._shown = None  # positions in _rows of the shown rows while searching
+        self._positions = None  # id -> position in _rows, built when a search needs it
+        self._by_id = {}  # id -> row
+        self._employees = WeakValueDictionary()  # id -> the Employee handed out for it
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._shown is None else len(self._shown)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._rows[self._position(index.row())][index.column() + 1]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def _position(self, row):
+        """Position in _rows of a shown row"""
+        return row if self._shown is None else self._shown[row]
+
+    def _row_at(self, position):
+        """Shown row of a position in _rows, -1 if the search hides it"""
+        if self._shown is None:
+            return position
+        row = bisect_left(self._shown, position)
+        return row if row < len(self._shown) and self._shown[row] == position else -1
+
+    def _update_shown(self):
+        """Recomputes the shown rows; the cost follows the number of matches, not of employees"""
+        if self._match_ids is None:
+            self._shown = None
+            return
+        if self._positions is None:
+            self._positions = {row[0]: position for position, row in enumerate(self._rows)}
+        positions = self._positions
+        self._shown = sorted(positions[id_] for id_ in self._match_ids if id_ in positions)
+
+    def load(self, rows):
+        """Replaces all rows; rows must already be sorted by first and last name"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._keys = [(row[1], row[2]) for row in self._rows]
+        self._by_id = {row[0]: row for row in self._rows}
+        self._positions = None
+        for id_, employee in list(self._employees.items()):
+            row_data = self._by_id.get(id_)
+            if row_data is None:
+                del self._employees[id_]
+            else:
+                employee.patch(row_data)
+        self._update_shown()
+        self.endResetModel()
+
+    def set_filter(self, employee_ids):
+        """Shows only the employees with the given ids, or everyone if employee_ids is None"""
+        self.beginResetModel()
+        self._match_ids = employee_ids
+        self._update_shown()
+        self.endResetModel()
+
+    def is_filtered(self):
+        return self._shown is not None
+
+    def total_count(self):
+        """Number of employees, including those the search hides"""
+        return len(self._rows)
+
+    def employee_at(self, row):
+        """The Employee of a shown row; the same object as long as it is in use"""
+        row_data = self._rows[self._position(row)]
+        employee = self._employees.get(row_data[0])
+        if employee is None:
+            employee = self._employees[row_data[0]] = Employee.from_row(row_data)
+        return employee
+
+    def employees(self):
+        for row in range(self.rowCount()):
+            yield self.employee_at(row)
+
+    def position_of(self, employee_id):
+        """Position of an employee in _rows, found by bisecting on the name it is currently sorted under"""
+        row_data = self._by_id.get(employee_id)
+        if row_data is None:
+            return -1
+        key = (row_data[1], row_data[2])
+        position = bisect_left(self._keys, key)
+        while position < len(self._rows) and self._keys[position] == key:
+            if self._rows[position][0] == employee_id:
+                return position
+            position += 1
+        return -1
+
+    def insert_employee(self, row_data):
+        """Adds an employee; returns its shown row (-1 if the search hides it)"""
+        position = bisect_right(self._keys, (row_data[1], row_data[2]))
+        if self._shown is None:
+            self.beginInsertRows(QModelIndex(), position, position)
         else:
-            # Subsequent years: show all 12 months
-            months_to_show = range(1, 13)
-        
-        # Clear all tabs
-        self.tabs.clear()
-        
-        # Recreate all tabs
-        for month in months_to_show:
-            self.tabs.addTab(self.create_month_tab(month), f"{month}. Ay")
-        
-        # Restore the current tab index
-        if 0 <= current_index < self.tabs.count():
-            self.tabs.setCurrentIndex(current_index)
+            self.beginResetModel()
+        self._rows.insert(position, row_data)
+        self._keys.insert(position, (row_data[1], row_data[2]))
+        self._by_id[row_data[0]] = row_data
+        self._positions = None
+        if self._shown is None:
+            self.endInsertRows()
+            return position
+        self._update_shown()
+        self.endResetModel()
+        return self._row_at(position)
+
+    def remove_employee(self, employee_id):
+        position = self.position_of(employee_id)
+        if position < 0:
+            return
+        if self._shown is None:
+            self.beginRemoveRows(QModelIndex(), position, position)
+        else:
+            self.beginResetModel()
+        del self._rows[position]
+        del self._keys[position]
+        del self._by_id[employee_id]
+        self._employees.pop(employee_id, None)
+        self._positions = None
+        if self._shown is None:
+            self.endRemoveRows()
+        else:
+            self._update_shown()
+            self.endResetModel()
+
+    def update_employee(self, row_data):
+        """
+        Replaces an employee's row, or adds it if it is not listed, moving it only if
+        its name changed its position; the employee's object, if one is in use, is
+        patched. Returns its shown row (-1 if the search hides it).
+        """
+        employee_id = row_data[0]
+        employee = self._employees.get(employee_id)
+        position = self.position_of(employee_id)
+        if position < 0:
+            row = self.insert_employee(row_data)
+        elif self._keys[position] == (row_data[1], row_data[2]):
+            self._rows[position] = row_data
+            self._by_id[employee_id] = row_data
+            row = self._row_at(position)
+            if row >= 0:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+        else:
+            self.remove_employee(employee_id)
+            row = self.insert_employee(row_data)
+        if employee is not None:
+            employee.patch(row_data)
+            self._employees[employee_id] = employee
+        return row
+
+    def apply_changes(self, rows, deleted_ids):
+        """Applies fetch_employee_changes results: updates or adds rows, removes the deleted ids"""
+        for row_data in rows:
+            self.update_employee(row_data)
+        for employee_id in deleted_ids:
+            self.remove_employee(employee_id)
+
+
+class QueryStatsDialog(QDialog):
+    """Queries and SQLite time per user action, as collected by query_stats"""
+
+    COLUMNS = ["İşlem", "Çağrı", "Sorgu", "Sorgu/Çağrı", "Toplam (ms)", "En Yavaş (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Sorgu İstatistikleri")
+        self.resize(640, 360)
+        layout = QVBoxLayout()
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Yenile")
+        reset_btn = QPushButton("Sıfırla")
+        close_btn = QPushButton("Kapat")
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(reset_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        refresh_btn.clicked.connect(self.refresh)
+        reset_btn.clicked.connect(self.reset)
+        close_btn.clicked.connect(self.accept)
+        self.refresh()
+
+    def refresh(self):
+        state = "açık" if query_stats.enabled else "kapalı (Araçlar menüsünden açılabilir)"
+        self.status_label.setText(
+            f"İstatistik toplama {state}. {query_stats.slow_seconds * 1000:.0f} ms üzerindeki sorgular "
+            f"yavaş sorgu günlüğüne yazılır.")
+        rows = query_stats.snapshot()
+        self.table.setRowCount(len(rows))
+        for row, (name, calls, queries, seconds, slowest) in enumerate(rows):
+            per_call = f"{queries / calls:.1f}" if calls else "-"
+            values = [name, str(calls), str(queries), per_call, f"{seconds * 1000:.1f}", f"{slowest * 1000:.1f}"]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset(self):
+        query_stats.reset()
+        self.refresh()
 
 
 class MainWindow(QMainWindow):
+    # Emitted whenever the employee list has been (re)loaded
+    employees_loaded = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.hotel_name = "Assos Kadırga Otel"  # You can change this to your hotel name
         self.setWindowTitle(f"{self.hotel_name} - Maaş Takip Sistemi")
         self.resize(600, 400)
+
+        # Tools menu: query instrumentation
+        tools_menu = self.menuBar().addMenu("Araçlar")
+        self.query_stats_action = QAction("Sorgu İstatistiklerini Topla", self)
+        self.query_stats_action.setCheckable(True)
+        self.query_stats_action.setChecked(query_stats.enabled)
+        self.query_stats_action.toggled.connect(self.set_query_stats_enabled)
+        tools_menu.addAction(self.query_stats_action)
+        show_stats_action = QAction("Sorgu İstatistikleri...", self)
+        show_stats_action.triggered.connect(self.show_query_stats)
+        tools_menu.addAction(show_stats_action)
         main_widget = QWidget()
         main_layout = QVBoxLayout()
 
@@ -909,10 +1450,23 @@ class MainWindow(QMainWindow):
         self.employee_count_label.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(self.employee_count_label)
 
+        # Employee Search
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 Ad veya soyad ile ara...")
+        self.search_edit.setClearButtonEnabled(True)
+        main_layout.addWidget(self.search_edit)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_task = None
+
         # Employee Table
-        self.employee_table = QTableWidget(0, 2)
-        self.employee_table.setHorizontalHeaderLabels(["Ad", "Soyad"])
+        self.employee_model = EmployeeTableModel(self)
+        self.employee_table = QTableView()
+        self.employee_table.setModel(self.employee_model)
         self.employee_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights keep scrolling cheap with very long rosters
+        self.employee_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.employee_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.employee_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         main_layout.addWidget(self.employee_table)
@@ -922,17 +1476,18 @@ class MainWindow(QMainWindow):
         self.add_btn = QPushButton("Ekle")
         self.delete_btn = QPushButton("Sil")
         self.update_btn = QPushButton("Güncelle")
+        self.import_btn = QPushButton("Avans İçe Aktar")
+        self.export_btn = QPushButton("Yıllık Döküm")
         button_layout.addWidget(self.add_btn)
         button_layout.addWidget(self.delete_btn)
         button_layout.addWidget(self.update_btn)
+        button_layout.addWidget(self.import_btn)
+        button_layout.addWidget(self.export_btn)
         main_layout.addLayout(button_layout)
 
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
-        # Data
-        self.employees = []
-
         # System Tray Icon
         self.tray_icon = QSystemTrayIcon(self)
         icon = self.style().standardIcon(QStyle.SP_ComputerIcon)
@@ -943,24 +1498,48 @@ class MainWindow(QMainWindow):
         self.add_btn.clicked.connect(self.add_employee)
         self.delete_btn.clicked.connect(self.delete_employee)
         self.update_btn.clicked.connect(self.update_employee)
-        self.employee_table.cellDoubleClicked.connect(self.show_employee_detail)
+        self.import_btn.clicked.connect(self.import_advances)
+        self.export_btn.clicked.connect(self.export_ledger)
+        self.search_edit.textChanged.connect(lambda text: self.search_timer.start())
+        self.search_timer.timeout.connect(self.search_employees)
+        self.employee_table.doubleClicked.connect(lambda index: self.show_employee_detail(index.row(), index.column()))
 
-        self.refresh_employee_table()
+        # Track last notification date to prevent duplicates
+        self.last_notification_date = None
 
-        # Timer to check salary due
+        # Employees by pay day; the salary check is armed for the next due moment
+        # whenever the index changes, once the employee list has been loaded
+        self.pay_days = PayDayIndex()
         self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        # Coarse timers may fire up to 5% late, minutes for long waits
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.check_salary_due)
-        self.timer.start(3600000)  # check every hour instead of every minute
-        
-        # Track last notification date to prevent duplicates
-        self.last_notification_date = None
+
+        self.employee_load_task = None
+        # Highest employee revision the list reflects (None until it is loaded) and
+        # the connection's data_version then; see refresh_changed_employees
+        self.employee_revision = None
+        self.data_version = None
+        self.employee_changes_task = None
+        # Nothing is read until start()
+        self.set_employee_buttons_enabled(False)
+        self.employee_count_label.setText("👥 Çalışanlar yükleniyor...")
+
+    def start(self):
+        """
+        Loads the employee list and closes finished periods in the background. main()
+        calls this once the window has been painted and the database opened and migrated.
+        """
+        self.refresh_employee_table()
+        self.close_periods()
 
     def toggle_dark_mode(self):
         if not self.dark_mode:
             # Apply dark stylesheet
             dark_stylesheet = """
                 QWidget { background-color: #232629; color: #f0f0f0; }
-                QTableWidget, QTabWidget, QGroupBox, QDialog, QMenu, QHeaderView::section {
+                QTableWidget, QTableView, QTabWidget, QGroupBox, QDialog, QMenuBar, QMenu, QHeaderView::section {
                     background-color: #232629; color: #f0f0f0; border: 1px solid #444;
                 }
                 QPushButton { background-color: #444; color: #f0f0f0; border-radius: 4px; padding: 6px; }
@@ -980,6 +1559,7 @@ class MainWindow(QMainWindow):
             self.dark_mode_btn.setText("🌙 Dark Mode")
             self.dark_mode = False
 
+    @query_stats.tracked("Çalışan ekleme")
     def add_employee(self):
         dialog = AddEmployeeDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -995,7 +1575,14 @@ class MainWindow(QMainWindow):
                         (first, last, start_date.toString("yyyy-MM-dd"), salary)
                     )
                     conn.commit()
-                    self.refresh_employee_table()
+                    self.cancel_employee_changes()
+                    row_data = (cursor.lastrowid, first, last, start_date.toString("yyyy-MM-dd"), salary)
+                    self.employee_model.insert_employee(row_data)
+                    self.index_pay_day(row_data)
+                    self.schedule_salary_check()
+                    self.update_employee_count()
+                    if self.employee_model.is_filtered():
+                        self.search_employees()
                     QMessageBox.information(self, "Başarılı", "Çalışan başarıyla eklendi!")
                 except sqlite3.Error as e:
                     QMessageBox.critical(self, "Veritabanı Hatası", 
@@ -1007,36 +1594,206 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Geçersiz Veri", 
                                   "Lütfen tüm alanları doldurun ve geçerli bir maaş girin!")
 
+    @query_stats.tracked("Çalışan listesi")
     def refresh_employee_table(self):
+        """Reloads the employee list in the background; editing is disabled meanwhile"""
+        if self.employee_load_task is not None:
+            self.employee_load_task.cancel()
+        self.cancel_employee_changes()
+        self.set_employee_buttons_enabled(False)
+        self.employee_count_label.setText("👥 Çalışanlar yükleniyor...")
+        self.employee_load_task = run_query(fetch_employee_rows, self.on_employees_loaded,
+                                            self.on_employees_load_failed)
+
+    def on_employees_loaded(self, result):
+        self.employee_load_task = None
+        self.employee_revision, rows = result
+        # Whether other connections wrote meanwhile is not known, so the next activation checks
+        self.data_version = None
+        self.employee_model.load(rows)
+        self.pay_days.clear()
+        for row_data in rows:
+            self.index_pay_day(row_data)
+        self.set_employee_buttons_enabled(True)
+        
+        # Update employee count
+        self.update_employee_count()
+        if self.employee_model.is_filtered():
+            self.search_employees()
+        self.employees_loaded.emit()
+        # May open the salary reminder, which blocks until it is closed
+        self.check_salary_due()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.ActivationChange and self.isActiveWindow():
+            self.refresh_changed_employees()
+
+    def refresh_changed_employees(self):
+        """
+        Brings the list up to date with employees changed by other connections (another
+        instance of the application, command-line tools) when the window is activated.
+        Nothing is read unless the connection's data_version shows another connection
+        has committed; then only the employees changed since employee_revision are.
+        """
+        if (self.employee_revision is None or self.employee_load_task is not None
+                or self.employee_changes_task is not None):
+            return
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, first_name, last_name, start_date, salary FROM employees ORDER BY first_name, last_name")
-            rows = cursor.fetchall()
-            self.employees = []
-            self.employee_table.setRowCount(len(rows))
-            for row_idx, (id_, first_name, last_name, start_date_str, salary) in enumerate(rows):
-                start_date = QDate.fromString(start_date_str, "yyyy-MM-dd")
-                emp = Employee(id_, first_name, last_name, start_date, salary)
-                self.employees.append(emp)
-                self.employee_table.setItem(row_idx, 0, QTableWidgetItem(first_name))
-                self.employee_table.setItem(row_idx, 1, QTableWidgetItem(last_name))
-            
-            # Update employee count
-            self.update_employee_count()
-        except sqlite3.Error as e:
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return
+        if data_version == self.data_version:
+            return
+        self.data_version = data_version
+        since = self.employee_revision
+        self.employee_changes_task = run_query(lambda connection: fetch_employee_changes(connection, since),
+                                               self.on_employee_changes, self.on_employee_changes_failed)
+
+    def cancel_employee_changes(self):
+        """
+        Drops the changes being fetched, to be fetched again on the next activation.
+        Called when the list is reloaded and after this window writes employees,
+        since changes read before the write would undo it in the list.
+        """
+        if self.employee_changes_task is not None:
+            self.employee_changes_task.cancel()
+            self.employee_changes_task = None
+            self.data_version = None
+
+    def on_employee_changes(self, result):
+        self.employee_changes_task = None
+        self.employee_revision, rows, deleted_ids = result
+        if not rows and not deleted_ids:
+            return
+        self.employee_model.apply_changes(rows, deleted_ids)
+        for row_data in rows:
+            # Start date and base salary affect every month's balance
+            carry_cache.invalidate(row_data[0])
+            self.index_pay_day(row_data)
+        for employee_id in deleted_ids:
+            carry_cache.invalidate(employee_id)
+            self.pay_days.remove(employee_id)
+        self.schedule_salary_check()
+        self.update_employee_count()
+        if self.employee_model.is_filtered():
+            self.search_employees()
+
+    def on_employee_changes_failed(self, error):
+        self.employee_changes_task = None
+        # The list stays as it is; the next activation tries again
+        self.data_version = None
+        print(f"Çalışan değişiklikleri okunamadı: {error}", file=sys.stderr)
+
+    def on_employees_load_failed(self, error):
+        self.employee_load_task = None
+        self.set_employee_buttons_enabled(True)
+        self.update_employee_count()
+        if isinstance(error, sqlite3.Error):
             QMessageBox.critical(self, "Veritabanı Hatası", 
-                               f"Çalışan listesi yüklenirken hata oluştu:\n{str(e)}")
-        except Exception as e:
+                               f"Çalışan listesi yüklenirken hata oluştu:\n{str(error)}")
+        else:
             QMessageBox.critical(self, "Beklenmeyen Hata", 
-                               f"Beklenmeyen bir hata oluştu:\n{str(e)}")
+                               f"Beklenmeyen bir hata oluştu:\n{str(error)}")
+
+    @query_stats.tracked("Çalışan arama")
+    def search_employees(self):
+        """Filters the employee list by the words in the search box, searching in the background"""
+        self.search_timer.stop()
+        if self.search_task is not None:
+            self.search_task.cancel()
+            self.search_task = None
+        text = self.search_edit.text()
+        if not search_terms(text):
+            self.employee_model.set_filter(None)
+            self.update_employee_count()
+            return
+
+        def found(employee_ids):
+            self.search_task = None
+            self.employee_model.set_filter(employee_ids)
+            self.update_employee_count()
+
+        def failed(error):
+            self.search_task = None
+            show_query_error(self, error)
+
+        self.search_task = run_query(lambda connection: search_employee_ids(connection, text), found, failed)
+
+    def set_employee_buttons_enabled(self, enabled):
+        for button in (self.add_btn, self.delete_btn, self.update_btn):
+            button.setEnabled(enabled)
+
+    @query_stats.tracked("Avans içe aktarma")
+    def import_advances(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Avans İçe Aktar", "", "CSV Dosyaları (*.csv *.txt);;Tüm Dosyalar (*)")
+        if not path:
+            return
+        import advance_import
+
+        def imported(result):
+            count, employee_ids = result
+            self.import_btn.setEnabled(True)
+            for employee_id in employee_ids:
+                carry_cache.invalidate(employee_id)
+            QMessageBox.information(self, "Başarılı",
+                                    f"{len(employee_ids)} çalışan için {count} avans başarıyla eklendi!")
+
+        def failed(error):
+            self.import_btn.setEnabled(True)
+            if isinstance(error, advance_import.AdvanceImportError):
+                QMessageBox.warning(self, "Geçersiz Dosya",
+                                    f"Hiçbir avans eklenmedi, {error.error_count} hatalı satır var:\n\n{error.report()}")
+            elif isinstance(error, (OSError, UnicodeDecodeError)):
+                QMessageBox.warning(self, "Dosya Hatası", f"Dosya okunamadı:\n{str(error)}")
+            else:
+                show_query_error(self, error)
 
+        # Validating and inserting large files takes a while, so it runs in the background
+        self.import_btn.setEnabled(False)
+        run_query(lambda connection: advance_import.import_advances(connection, path), imported, failed)
+
+    @query_stats.tracked("Yıllık döküm")
+    def export_ledger(self):
+        import ledger_export
+        current_year = QDate.currentDate().year()
+        year, ok = QInputDialog.getInt(self, "Yıllık Döküm", "Yıl:", current_year, 1900, current_year)
+        if not ok:
+            return
+        filters = "CSV Dosyası (*.csv)"
+        if ledger_export.xlsx_available():
+            filters = "Excel Dosyası (*.xlsx);;" + filters
+        path, selected_filter = QFileDialog.getSaveFileName(self, "Yıllık Döküm", f"maas_dokumu_{year}", filters)
+        if not path:
+            return
+        file_format = "xlsx" if selected_filter.startswith("Excel") else "csv"
+        if not path.lower().endswith("." + file_format):
+            path += "." + file_format
+
+        def exported(count):
+            self.export_btn.setEnabled(True)
+            QMessageBox.information(self, "Başarılı", f"{count} satırlık döküm kaydedildi:\n{path}")
+
+        def failed(error):
+            self.export_btn.setEnabled(True)
+            if isinstance(error, OSError):
+                QMessageBox.warning(self, "Dosya Hatası", f"Dosya yazılamadı:\n{str(error)}")
+            else:
+                show_query_error(self, error)
+
+        self.export_btn.setEnabled(False)
+        through_month = ledger_export.through_month_of(year)
+        run_query(lambda connection: ledger_export.export(connection, year, path, file_format, through_month),
+                  exported, failed)
+
+    @query_stats.tracked("Çalışan silme")
     def delete_employee(self):
-        selected = self.employee_table.currentRow()
-        if selected < 0 or selected >= len(self.employees):
+        selected = self.employee_table.currentIndex().row()
+        if selected < 0 or selected >= self.employee_model.rowCount():
             QMessageBox.warning(self, "Seçim Gerekli", "Lütfen silinecek çalışanı seçin!")
             return
         
-        emp = self.employees[selected]
+        emp = self.employee_model.employee_at(selected)
         
         # Ask for confirmation
         reply = QMessageBox.question(self, "Onay", 
@@ -1048,7 +1805,12 @@ class MainWindow(QMainWindow):
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM employees WHERE id = ?", (emp.id,))
                 conn.commit()
-                self.refresh_employee_table()
+                self.cancel_employee_changes()
+                carry_cache.invalidate(emp.id)
+                self.employee_model.remove_employee(emp.id)
+                self.pay_days.remove(emp.id)
+                self.schedule_salary_check()
+                self.update_employee_count()
                 QMessageBox.information(self, "Başarılı", "Çalışan başarıyla silindi!")
             except sqlite3.Error as e:
                 QMessageBox.critical(self, "Veritabanı Hatası", 
@@ -1057,17 +1819,18 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, "Beklenmeyen Hata", 
                                    f"Beklenmeyen bir hata oluştu:\n{str(e)}")
 
+    @query_stats.tracked("Çalışan güncelleme")
     def update_employee(self):
-        selected = self.employee_table.currentRow()
-        if selected < 0 or selected >= len(self.employees):
+        selected = self.employee_table.currentIndex().row()
+        if selected < 0 or selected >= self.employee_model.rowCount():
             QMessageBox.warning(self, "Seçim Gerekli", "Lütfen güncellenecek çalışanı seçin!")
             return
-        emp = self.employees[selected]
+        emp = self.employee_model.employee_at(selected)
         dialog = AddEmployeeDialog(self)
         dialog.first_name_edit.setText(emp.first_name)
         dialog.last_name_edit.setText(emp.last_name)
         dialog.start_date_edit.setDate(emp.start_date)
-        dialog.salary_edit.setText(str(emp.salary))
+        dialog.salary_edit.setText(format_money(emp.salary))
         if dialog.exec_() == QDialog.Accepted:
             first, last, start_date, salary = dialog.get_employee_data()
             if first is None or last is None or start_date is None:
@@ -1082,7 +1845,16 @@ class MainWindow(QMainWindow):
                                    WHERE id = ?
                     """, (first, last, start_date.toString("yyyy-MM-dd"), salary, emp.id))
                     conn.commit()
-                    self.refresh_employee_table()
+                    self.cancel_employee_changes()
+                    # Start date and base salary affect every month's balance
+                    carry_cache.invalidate(emp.id)
+                    row_data = (emp.id, first, last, start_date.toString("yyyy-MM-dd"), salary)
+                    row = self.employee_model.update_employee(row_data)
+                    self.index_pay_day(row_data)
+                    self.schedule_salary_check()
+                    self.employee_table.selectRow(row)
+                    if self.employee_model.is_filtered():
+                        self.search_employees()
                     QMessageBox.information(self, "Başarılı", "Çalışan bilgileri başarıyla güncellendi!")
                 except sqlite3.Error as e:
                     QMessageBox.critical(self, "Veritabanı Hatası", 
@@ -1096,8 +1868,11 @@ class MainWindow(QMainWindow):
 
     def update_employee_count(self):
         """Update the employee count display"""
-        count = len(self.employees)
-        self.employee_count_label.setText(f"👥 Toplam Çalışan: {count}")
+        count = self.employee_model.total_count()
+        if self.employee_model.is_filtered():
+            self.employee_count_label.setText(f"👥 Bulunan: {self.employee_model.rowCount()} / {count} Çalışan")
+        else:
+            self.employee_count_label.setText(f"👥 Toplam Çalışan: {count}")
         
         # Change color based on count
         if count == 0:
@@ -1137,34 +1912,83 @@ class MainWindow(QMainWindow):
                 }
             """)
 
+    @query_stats.tracked("Dönem kapatma")
+    def close_periods(self):
+        """
+        Closes the finished years that are not closed yet in the background, so that
+        balances are summed from the last year end instead of each start date
+        """
+        import payroll_batch
+        month, year = payroll_batch.last_closable_month()
+
+        def failed(error):
+            # Balances are still right without the closings, only slower
+            print(f"Dönemler kapatılamadı: {error}", file=sys.stderr)
+
+        run_query(lambda connection: payroll_batch.close_periods(connection, month, year), lambda count: None, failed)
+
+    def set_query_stats_enabled(self, enabled):
+        query_stats.enabled = enabled
+
+    def show_query_stats(self):
+        QueryStatsDialog(self).exec_()
+
     def show_employee_detail(self, row, column):
-        if 0 <= row < len(self.employees):
-            emp = self.employees[row]
-            dlg = EmployeeDetailDialog(emp, self)
+        if 0 <= row < self.employee_model.rowCount():
+            emp = self.employee_model.employee_at(row)
+            with query_stats.action("Çalışan detayı açma"):
+                dlg = EmployeeDetailDialog(emp, self)
             dlg.exec_()
 
-    def check_salary_due(self):
-        today = QDate.currentDate()
-        
-        # Prevent duplicate notifications on the same day
-        if self.last_notification_date == today:
+    def index_pay_day(self, row_data):
+        """Adds or updates an employee row (id, first, last, start_date, salary) in the pay-day index"""
+        id_, first_name, last_name, start_date_str, salary = row_data
+        self.pay_days.add(id_, date.fromisoformat(start_date_str), row_data)
+
+    def schedule_salary_check(self):
+        """
+        Arms the salary check for the start of the next day someone's salary is due,
+        or right away if today's reminder has not been shown yet. The timer is re-armed
+        at least every SALARY_CHECK_MAX_WAIT so clock changes and sleep are caught up.
+        """
+        now = datetime.now()
+        today = now.date()
+        if self.last_notification_date != today and self.pay_days.due_on(today):
+            self.timer.start(0)
             return
-            
-        # Check for employees whose salary is due today
-        due_employees = []
-        for emp in self.employees:
-            if emp.start_date.day() == today.day():
-                due_employees.append(emp)
-        
-        if due_employees:
+        next_due = self.pay_days.next_due_date(today + timedelta(days=1))
+        wait = SALARY_CHECK_MAX_WAIT
+        if next_due is not None:
+            wait = min(wait, datetime.combine(next_due, time()) - now)
+        self.timer.start(max(0, int(wait.total_seconds() * 1000)) + 1000)
+
+    @query_stats.tracked("Maaş günü kontrolü")
+    def check_salary_due(self):
+        today = date.today()
+        try:
+            # Prevent duplicate notifications on the same day
+            if self.last_notification_date == today:
+                return
+            due = self.pay_days.due_on(today)
+            if not due:
+                return
+            # Mark this date as notified
+            self.last_notification_date = today
+
+            # Reminders show the salary of this month, including any override
+            due_employees = []
+            for _, row_data in sorted(due, key=lambda item: item[1][1:3]):
+                emp = Employee.from_row(row_data)
+                due_employees.append((emp, emp.get_salary_for_month(today.month, today.year)))
+
             # Create detailed notification message
             if len(due_employees) == 1:
-                emp = due_employees[0]
+                emp, _ = due_employees[0]
                 message = f"Bugün {emp.first_name} {emp.last_name} için maaş ödeme günü!"
             else:
-                names = ", ".join(f"{emp.first_name} {emp.last_name}" for emp in due_employees)
+                names = ", ".join(f"{emp.first_name} {emp.last_name}" for emp, _ in due_employees)
                 message = f"Bugün {len(due_employees)} çalışan için maaş ödeme günü:\n{names}"
-            
+
             # Show system tray notification
             self.tray_icon.showMessage(
                 f"💰 {self.hotel_name} - Maaş Ödeme Hatırlatıcısı",
@@ -1172,25 +1996,24 @@ class MainWindow(QMainWindow):
                 QSystemTrayIcon.Information,
                 8000  # Show for 8 seconds
             )
-            
+
             # Also show a dialog box for more visibility
             self.show_salary_due_dialog(due_employees)
-            
-            # Mark this date as notified
-            self.last_notification_date = today
-    
+        finally:
+            self.schedule_salary_check()
+
     def show_salary_due_dialog(self, due_employees):
-        """Show a dialog box with salary due information"""
+        """Show a dialog box with salary due information; due_employees are (employee, salary) pairs"""
         msg = QMessageBox(self)
         msg.setWindowTitle(f"💰 {self.hotel_name} - Maaş Ödeme Hatırlatıcısı")
         msg.setIcon(QMessageBox.Information)
         
         if len(due_employees) == 1:
-            emp = due_employees[0]
+            emp, salary = due_employees[0]
             msg.setText(f"Bugün {emp.first_name} {emp.last_name} için maaş ödeme günü!")
-            msg.setInformativeText(f"Çalışan: {emp.first_name} {emp.last_name}\nMaaş: {emp.salary:.2f} TL")
+            msg.setInformativeText(f"Çalışan: {emp.first_name} {emp.last_name}\nMaaş: {format_money(salary)} TL")
         else:
-            names = "\n".join(f"• {emp.first_name} {emp.last_name} ({emp.salary:.2f} TL)" for emp in due_employees)
+            names = "\n".join(f"• {emp.first_name} {emp.last_name} ({format_money(salary)} TL)" for emp, salary in due_employees)
             msg.setText(f"Bugün {len(due_employees)} çalışan için maaş ödeme günü!")
             msg.setInformativeText(f"Çalışanlar:\n{names}")
         
@@ -1200,13 +2023,112 @@ class MainWindow(QMainWindow):
         # Show the dialog but don't block the main window
         msg.show()
 
+def run_command(argv):
+    """
+    Runs a headless command-line command instead of the GUI, returning its exit code,
+    or None if argv does not name one (the GUI also accepts --startup-timing, which
+    reports how long each startup phase took):
+
+        python main.py payroll --year 2026 --month 9 [--format csv|json]
+        python main.py hak-edis --date 31.10.2026 12 15 [--file cikislar.csv]
+        python main.py rebuild-summary
+        python main.py close-periods [--year 2025 --month 12] [--monthly]
+        python main.py import-advances avanslar.csv
+        python main.py ledger --year 2026 [--format csv|xlsx] [--output dokum.xlsx]
+    """
+    if not argv or argv[0] not in ("payroll", "hak-edis", "rebuild-summary", "import-advances", "ledger",
+                                   "close-periods"):
+        return None
+    # Brings older databases up to date (e.g. creates monthly_summary) like the GUI does
+    try:
+        migrate(open_connection(), print_progress)
+    except MigrationError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if argv[0] == "rebuild-summary":
+        rows = rebuild_monthly_summary(conn)
+        print(f"monthly_summary yeniden oluşturuldu: {rows} satır")
+        return 0
+    if argv[0] == "ledger":
+        import ledger_export
+        return ledger_export.main(argv[1:], conn)
+    if argv[0] == "import-advances":
+        import advance_import
+        return advance_import.main(argv[1:], conn)
+    import payroll_batch
+    if argv[0] == "hak-edis":
+        return payroll_batch.settlement_main(argv[1:], conn)
+    if argv[0] == "close-periods":
+        return payroll_batch.close_main(argv[1:], conn)
+    return payroll_batch.main(argv[1:], conn)
+
+
+class FirstPaint(QObject):
+    """Calls callback once from the event loop, after the widget's first paint event"""
+
+    def __init__(self, widget, callback):
+        super().__init__(widget)
+        self.callback = callback
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            watched.removeEventFilter(self)
+            # Queued so that the paint finishes first
+            QTimer.singleShot(0, self.callback)
+        return False
+
+
+class StartupTiming:
+    """Durations of the startup phases for --startup-timing, from when main.py started running"""
+
+    def __init__(self):
+        self.phases = [("Modül yükleme", _IMPORTED - _STARTED)]
+        self.last = _IMPORTED
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, parent=None):
+        lines = [f"{phase:<24}{seconds * 1000:9.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'Toplam':<24}{(self.last - _STARTED) * 1000:9.1f} ms")
+        text = "\n".join(lines)
+        # Windowed builds have no console
+        if sys.stderr is not None:
+            print(text, file=sys.stderr)
+        else:
+            QMessageBox.information(parent, "Açılış Süreleri", text)
+
 
 def main():
+    exit_code = run_command(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    timing = StartupTiming()
     try:
-        initialize_database()
         app = QApplication(sys.argv)
+        timing.mark("QApplication")
         win = MainWindow()
         win.show()
+        timing.mark("Pencere oluşturma")
+
+        # Opening the database and the first employee load wait for the window to be on screen
+        def painted():
+            timing.mark("İlk çizim")
+            initialize_database(win)
+            timing.mark("Bağlantı ve şema")
+            win.start()
+
+        FirstPaint(win, painted)
+        if "--startup-timing" in sys.argv[1:]:
+            def loaded():
+                win.employees_loaded.disconnect(loaded)
+                timing.mark("Çalışan listesi")
+                timing.report(win)
+
+            win.employees_loaded.connect(loaded)
         sys.exit(app.exec_())
     except Exception as e:
         QMessageBox.critical(None, "Kritik Hata", 
@@ -0,0 +1,68 @@
+# -*- mode: python ; coding: utf-8 -*-
+#
+# Startup-optimized build: a folder (dist/OtelMaasTakipApp) instead of the single
+# file of main.spec, and no UPX. The single file unpacks Python and all of PyQt5
+# to a temporary directory on every launch and UPX-compressed DLLs are
+# decompressed on every load; here they are loaded from the folder as they are.
+#
+#     pyinstaller main_onedir.spec
+#
+# Run the built executable with --startup-timing to see where startup time goes.
+
+block_cipher = None
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[
+        'pkgutil',
+        'PyQt5.sip',
+        'PyQt5.QtCore',
+        'PyQt5.QtGui',
+        'PyQt5.QtWidgets',
+        'sqlite3'
+    ],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    # Never imported by the application
+    excludes=['tkinter', 'unittest', 'pydoc', 'PyQt5.QtWebEngineWidgets', 'PyQt5.QtQml', 'PyQt5.QtQuick'],
+    win_no_prefer_redirects=False,
+    win_private_assemblies=False,
+    cipher=block_cipher,
+    noarchive=False,
+)
+
+pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='OtelMaasTakipApp',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=None
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='OtelMaasTakipApp',
+)
@@ -0,0 +1,602 @@
+"""
+Versioned schema migrations, keyed on PRAGMA user_version.
+
+MIGRATIONS[i] brings a database from version i to version i + 1. migrate() runs
+the pending ones in order, each in its own transaction together with the
+user_version update, so a failed migration leaves the database at the previous
+version. Before the first pending migration of an existing database, an online
+backup is written next to it (otel_maas.db.v2-20261017-093000.bak). A database
+already on the current version costs a single PRAGMA read; nothing is probed.
+
+Foreign keys are off while migrations run, so that tables can be rebuilt (new
+table, copy, drop, rename) with their references in place; each migration's
+foreign keys are checked before it commits. Migrations report how far they are
+through progress(done, total). Once released, a migration is never changed; a
+later change to the schema is a new migration.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+from database import fill_by_employee_range, search_fold_sql
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, description, apply):
+        self.description = description
+        self.apply = apply  # apply(connection, progress)
+
+
+def _create_base_tables(connection, progress):
+    """
+    Tables of the first releases, created if missing, the description column that
+    older databases lack, the advances index, and the deletion of the advances and
+    salary overrides of employees deleted while foreign keys were not enforced
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            salary REAL NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS advances (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS salaries (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            salary REAL NOT NULL,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("PRAGMA table_info(advances)")
+    if "description" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE advances ADD COLUMN description TEXT")
+    # Month lookups filter advances by employee and date range
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_advances_employee_date ON advances (employee_id, date)")
+    cursor.execute("DELETE FROM advances WHERE employee_id NOT IN (SELECT id FROM employees)")
+    cursor.execute("DELETE FROM salaries WHERE employee_id NOT IN (SELECT id FROM employees)")
+
+
+# Trigger steps of monthly_summary, formatted with row=NEW or row=OLD
+_ADD_ADVANCE = """
+    INSERT INTO monthly_summary (employee_id, year, month, advances_total, advances_count)
+    VALUES ({row}.employee_id, CAST(substr({row}.date, 1, 4) AS INTEGER),
+            CAST(substr({row}.date, 6, 2) AS INTEGER), {row}.amount, 1)
+    ON CONFLICT (employee_id, year, month) DO UPDATE SET
+        advances_total = advances_total + excluded.advances_total,
+        advances_count = advances_count + 1;
+"""
+_REMOVE_ADVANCE = """
+    UPDATE monthly_summary SET
+        advances_total = CASE WHEN advances_count = 1 THEN 0 ELSE advances_total - {row}.amount END,
+        advances_count = advances_count - 1
+    WHERE employee_id = {row}.employee_id AND year = CAST(substr({row}.date, 1, 4) AS INTEGER)
+      AND month = CAST(substr({row}.date, 6, 2) AS INTEGER);
+    DELETE FROM monthly_summary
+    WHERE employee_id = {row}.employee_id AND year = CAST(substr({row}.date, 1, 4) AS INTEGER)
+      AND month = CAST(substr({row}.date, 6, 2) AS INTEGER)
+      AND advances_count = 0 AND salary IS NULL;
+"""
+_SET_SALARY = """
+    INSERT INTO monthly_summary (employee_id, year, month, salary)
+    VALUES ({row}.employee_id, {row}.year, {row}.month, {row}.salary)
+    ON CONFLICT (employee_id, year, month) DO UPDATE SET salary = excluded.salary;
+"""
+_REMOVE_SALARY = """
+    UPDATE monthly_summary SET salary = NULL
+    WHERE employee_id = {row}.employee_id AND year = {row}.year AND month = {row}.month;
+    DELETE FROM monthly_summary
+    WHERE employee_id = {row}.employee_id AND year = {row}.year AND month = {row}.month
+      AND advances_count = 0;
+"""
+
+_SUMMARY_TRIGGERS = {
+    "monthly_summary_advance_insert": ("AFTER INSERT ON advances", _ADD_ADVANCE.format(row="NEW")),
+    "monthly_summary_advance_delete": ("AFTER DELETE ON advances", _REMOVE_ADVANCE.format(row="OLD")),
+    "monthly_summary_advance_update": ("AFTER UPDATE OF employee_id, date, amount ON advances",
+                                       _REMOVE_ADVANCE.format(row="OLD") + _ADD_ADVANCE.format(row="NEW")),
+    "monthly_summary_salary_insert": ("AFTER INSERT ON salaries", _SET_SALARY.format(row="NEW")),
+    "monthly_summary_salary_delete": ("AFTER DELETE ON salaries", _REMOVE_SALARY.format(row="OLD")),
+    "monthly_summary_salary_update": ("AFTER UPDATE ON salaries",
+                                      _REMOVE_SALARY.format(row="OLD") + _SET_SALARY.format(row="NEW")),
+}
+
+
+def _create_triggers(cursor, triggers):
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} FOR EACH ROW BEGIN {body} END")
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _fill_summary_by_date(connection, progress):
+    """monthly_summary filled as before version 6, grouping advances by their date text"""
+    fill_by_employee_range(connection, """
+        INSERT INTO monthly_summary (employee_id, year, month, salary, advances_total, advances_count)
+        SELECT employee_id, year, month, MAX(salary), SUM(advances_total), SUM(advances_count)
+        FROM (
+            SELECT employee_id, year, month, salary, 0 AS advances_total, 0 AS advances_count
+            FROM salaries
+            WHERE employee_id BETWEEN :low AND :high
+            UNION ALL
+            SELECT employee_id, CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),
+                   NULL, SUM(amount), COUNT(*)
+            FROM advances
+            WHERE employee_id BETWEEN :low AND :high
+            GROUP BY employee_id, substr(date, 1, 7)
+        )
+        WHERE employee_id IN (SELECT id FROM employees)
+        GROUP BY employee_id, year, month
+    """, progress)
+
+
+def _create_monthly_summary(connection, progress):
+    """
+    monthly_summary, one row per employee and month that has a salary override or
+    advances: the override (NULL if the base salary applies) and the sum and number
+    of the month's advances, kept current by triggers on advances and salaries.
+    Databases of the releases before migrations may already have it.
+    """
+    cursor = connection.cursor()
+    created = not _table_exists(cursor, "monthly_summary")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_summary (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            salary REAL,
+            advances_total REAL NOT NULL DEFAULT 0,
+            advances_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    _create_triggers(cursor, _SUMMARY_TRIGGERS)
+    if created:
+        _fill_summary_by_date(connection, progress)
+
+
+# A change to a month's totals makes the closings from that month onwards stale;
+# formatted with row=NEW or row=OLD
+_REOPEN_PERIODS = """
+    DELETE FROM period_closings
+    WHERE employee_id = {row}.employee_id AND year * 12 + month >= {row}.year * 12 + {row}.month;
+"""
+
+_CLOSING_TRIGGERS = {
+    "period_closings_summary_insert": ("AFTER INSERT ON monthly_summary", _REOPEN_PERIODS.format(row="NEW")),
+    "period_closings_summary_delete": ("AFTER DELETE ON monthly_summary", _REOPEN_PERIODS.format(row="OLD")),
+    "period_closings_summary_update": ("AFTER UPDATE ON monthly_summary",
+                                       _REOPEN_PERIODS.format(row="OLD") + _REOPEN_PERIODS.format(row="NEW")),
+    # Every month depends on the start date and the base salary
+    "period_closings_employee_update": ("AFTER UPDATE OF start_date, salary ON employees",
+                                        "DELETE FROM period_closings WHERE employee_id = NEW.id;"),
+}
+
+
+def _create_period_closings(connection, progress):
+    """
+    period_closings, an employee's balance through the end of a closed month as
+    written by payroll_batch.close_periods; triggers delete the closings a change
+    to an earlier month or to the employee's start date or salary makes stale
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS period_closings (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            balance REAL NOT NULL,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    _create_triggers(cursor, _CLOSING_TRIGGERS)
+
+
+_SEARCH_NAME = search_fold_sql("NEW.first_name || ' ' || NEW.last_name")
+
+_SEARCH_TRIGGERS = {
+    "employee_search_insert": ("AFTER INSERT ON employees",
+                               f"INSERT INTO employee_search (rowid, name) VALUES (NEW.id, {_SEARCH_NAME});"),
+    "employee_search_delete": ("AFTER DELETE ON employees", "DELETE FROM employee_search WHERE rowid = OLD.id;"),
+    "employee_search_update": ("AFTER UPDATE OF id, first_name, last_name ON employees",
+                               "DELETE FROM employee_search WHERE rowid = OLD.id; "
+                               f"INSERT INTO employee_search (rowid, name) VALUES (NEW.id, {_SEARCH_NAME});"),
+}
+
+
+def _create_employee_search(connection, progress):
+    """
+    employee_search, an FTS5 index of the folded "first last" names keyed by
+    employee id with prefix indexes for short search terms, and the triggers
+    keeping it in sync with employees. SQLite builds without FTS5 are left without
+    it; search_employee_ids then scans the employees.
+    """
+    cursor = connection.cursor()
+    if _table_exists(cursor, "employee_search"):
+        return
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE employee_search USING fts5(name, prefix='1 2 3')")
+    except sqlite3.OperationalError as e:
+        print(f"Çalışan arama dizini oluşturulamadı: {e}", file=sys.stderr)
+        return
+    _create_triggers(cursor, _SEARCH_TRIGGERS)
+    cursor.execute(f"""
+        INSERT INTO employee_search (rowid, name)
+        SELECT id, {search_fold_sql("first_name || ' ' || last_name")} FROM employees
+    """)
+
+
+# Rows copied per statement while a table is rebuilt
+REBUILD_CHUNK = 50000
+
+# SQL expression of a REAL amount of lira as INTEGER kuruş; the inner ROUND drops
+# float residue (0.145 * 100 = 14.499999999999998) before rounding half away from zero
+_KURUS = "CAST(ROUND(ROUND({column} * 100, 6)) AS INTEGER)"
+
+
+def _rebuild_table(cursor, name, create, columns, values, progress=None):
+    """
+    Replaces table name by the table create makes (as new_<name>), copying the rows
+    with values, the SELECT expressions of columns, and keeping its AUTOINCREMENT
+    counter; rows are copied per range of rowids, reported through progress
+    """
+    # sqlite_sequence exists once the first AUTOINCREMENT table has been created
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (name,))
+    sequence = cursor.fetchone()
+    cursor.execute(create.format(table=f"new_{name}"))
+    cursor.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {name}")
+    first, last = cursor.fetchone()
+    if first is not None:
+        for low in range(first, last + 1, REBUILD_CHUNK):
+            high = min(low + REBUILD_CHUNK - 1, last)
+            cursor.execute(f"INSERT INTO new_{name} ({columns}) SELECT {values} FROM {name} "
+                           "WHERE rowid BETWEEN ? AND ?", (low, high))
+            if progress is not None:
+                progress(high - first + 1, last - first + 1)
+    cursor.execute(f"DROP TABLE {name}")
+    cursor.execute(f"ALTER TABLE new_{name} RENAME TO {name}")
+    if sequence is not None:
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = ?", (name,))
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, sequence[0]))
+
+
+def _store_kurus(connection, progress):
+    """
+    Money columns as INTEGER kuruş instead of REAL lira, so that sums are exact.
+    SQLite cannot change a column's type, so employees, advances and salaries are
+    rebuilt and their amounts converted; monthly_summary is refilled from them.
+    Period closings are float balances and are dropped; the catch-up job writes
+    them again from the exact amounts.
+    """
+    cursor = connection.cursor()
+    # The triggers of versions 2 to 4; they are created again once the tables are rebuilt
+    for name in [*_SUMMARY_TRIGGERS, *_CLOSING_TRIGGERS, *_SEARCH_TRIGGERS]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute("DROP TABLE monthly_summary")
+    cursor.execute("DROP TABLE period_closings")
+
+    _rebuild_table(cursor, "employees", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            salary INTEGER NOT NULL
+        )
+    """, "id, first_name, last_name, start_date, salary",
+        f"id, first_name, last_name, start_date, {_KURUS.format(column='salary')}")
+    _rebuild_table(cursor, "advances", """
+        CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            description TEXT,
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """, "id, employee_id, date, amount, description",
+        f"id, employee_id, date, {_KURUS.format(column='amount')}, description", progress)
+    _rebuild_table(cursor, "salaries", """
+        CREATE TABLE {table} (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            salary INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """, "employee_id, year, month, salary",
+        f"employee_id, year, month, {_KURUS.format(column='salary')}")
+    cursor.execute("CREATE INDEX idx_advances_employee_date ON advances (employee_id, date)")
+
+    cursor.execute("""
+        CREATE TABLE monthly_summary (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            salary INTEGER,
+            advances_total INTEGER NOT NULL DEFAULT 0,
+            advances_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    _fill_summary_by_date(connection, progress)
+    cursor.execute("""
+        CREATE TABLE period_closings (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    _create_triggers(cursor, _SUMMARY_TRIGGERS)
+    _create_triggers(cursor, _CLOSING_TRIGGERS)
+    if _table_exists(cursor, "employee_search"):
+        _create_triggers(cursor, _SEARCH_TRIGGERS)
+
+
+# Trigger steps of monthly_summary since version 6, where advances and salaries
+# carry their month as the integer period; formatted with row=NEW or row=OLD
+_ADD_PERIOD_ADVANCE = """
+    INSERT INTO monthly_summary (employee_id, year, month, advances_total, advances_count)
+    VALUES ({row}.employee_id, {row}.period / 12, {row}.period % 12 + 1, {row}.amount, 1)
+    ON CONFLICT (employee_id, year, month) DO UPDATE SET
+        advances_total = advances_total + excluded.advances_total,
+        advances_count = advances_count + 1;
+"""
+_REMOVE_PERIOD_ADVANCE = """
+    UPDATE monthly_summary SET
+        advances_total = CASE WHEN advances_count = 1 THEN 0 ELSE advances_total - {row}.amount END,
+        advances_count = advances_count - 1
+    WHERE employee_id = {row}.employee_id AND year = {row}.period / 12 AND month = {row}.period % 12 + 1;
+    DELETE FROM monthly_summary
+    WHERE employee_id = {row}.employee_id AND year = {row}.period / 12 AND month = {row}.period % 12 + 1
+      AND advances_count = 0 AND salary IS NULL;
+"""
+_SET_PERIOD_SALARY = """
+    INSERT INTO monthly_summary (employee_id, year, month, salary)
+    VALUES ({row}.employee_id, {row}.period / 12, {row}.period % 12 + 1, {row}.salary)
+    ON CONFLICT (employee_id, year, month) DO UPDATE SET salary = excluded.salary;
+"""
+_REMOVE_PERIOD_SALARY = """
+    UPDATE monthly_summary SET salary = NULL
+    WHERE employee_id = {row}.employee_id AND year = {row}.period / 12 AND month = {row}.period % 12 + 1;
+    DELETE FROM monthly_summary
+    WHERE employee_id = {row}.employee_id AND year = {row}.period / 12 AND month = {row}.period % 12 + 1
+      AND advances_count = 0;
+"""
+
+_PERIOD_SUMMARY_TRIGGERS = {
+    "monthly_summary_advance_insert": ("AFTER INSERT ON advances", _ADD_PERIOD_ADVANCE.format(row="NEW")),
+    "monthly_summary_advance_delete": ("AFTER DELETE ON advances", _REMOVE_PERIOD_ADVANCE.format(row="OLD")),
+    "monthly_summary_advance_update": ("AFTER UPDATE OF employee_id, period, amount ON advances",
+                                       _REMOVE_PERIOD_ADVANCE.format(row="OLD")
+                                       + _ADD_PERIOD_ADVANCE.format(row="NEW")),
+    "monthly_summary_salary_insert": ("AFTER INSERT ON salaries", _SET_PERIOD_SALARY.format(row="NEW")),
+    "monthly_summary_salary_delete": ("AFTER DELETE ON salaries", _REMOVE_PERIOD_SALARY.format(row="OLD")),
+    "monthly_summary_salary_update": ("AFTER UPDATE ON salaries",
+                                      _REMOVE_PERIOD_SALARY.format(row="OLD") + _SET_PERIOD_SALARY.format(row="NEW")),
+}
+
+# payroll.month_index of a 'YYYY-MM-DD' date
+_DATE_PERIOD = "CAST(substr({column}, 1, 4) AS INTEGER) * 12 + CAST(substr({column}, 6, 2) AS INTEGER) - 1"
+
+
+def _add_period_keys(connection, progress):
+    """
+    An integer period key, the payroll.month_index (year * 12 + month - 1) of the
+    month, on advances and salaries, so that month lookups, joins and groupings
+    compare integers instead of date text. advances gets a period column, derived
+    from its date and checked to match it, indexed with employee_id; salaries is
+    keyed on (employee_id, period) instead of year and month. monthly_summary rows
+    do not change; its triggers now read the period.
+    """
+    cursor = connection.cursor()
+    _rebuild_table(cursor, "advances", f"""
+        CREATE TABLE {{table}} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            period INTEGER NOT NULL CHECK (period = {_DATE_PERIOD.format(column="date")}),
+            amount INTEGER NOT NULL,
+            description TEXT,
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """, "id, employee_id, date, period, amount, description",
+        f"id, employee_id, date, {_DATE_PERIOD.format(column='date')}, amount, description", progress)
+    _rebuild_table(cursor, "salaries", """
+        CREATE TABLE {table} (
+            employee_id INTEGER NOT NULL,
+            period INTEGER NOT NULL,
+            salary INTEGER NOT NULL,
+            PRIMARY KEY (employee_id, period),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        )
+    """, "employee_id, period, salary", "employee_id, year * 12 + month - 1, salary")
+    # A month's advances in date order come straight from the index
+    cursor.execute("CREATE INDEX idx_advances_employee_period ON advances (employee_id, period, date)")
+    _create_triggers(cursor, _PERIOD_SUMMARY_TRIGGERS)
+
+
+# Gives an employee id the next revision; formatted with row=NEW or row=OLD
+_BUMP_REVISION = """
+    INSERT INTO employee_revisions (employee_id, revision)
+    VALUES ({row}.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM employee_revisions))
+    ON CONFLICT (employee_id) DO UPDATE SET revision = excluded.revision;
+"""
+
+_REVISION_TRIGGERS = {
+    "employee_revisions_insert": ("AFTER INSERT ON employees", _BUMP_REVISION.format(row="NEW")),
+    "employee_revisions_delete": ("AFTER DELETE ON employees", _BUMP_REVISION.format(row="OLD")),
+    "employee_revisions_update": ("AFTER UPDATE ON employees",
+                                  _BUMP_REVISION.format(row="OLD") + _BUMP_REVISION.format(row="NEW")),
+}
+
+
+def _create_employee_revisions(connection, progress):
+    """
+    employee_revisions, the revision of the last insert, update or delete of each
+    employee id, from a counter shared by all employees. Rows of deleted employees
+    stay as tombstones, so a reader that remembers the highest revision it has seen
+    can fetch just the employees changed or deleted since. Existing employees have
+    no revision; readers start from a full read.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE employee_revisions (
+            employee_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_employee_revisions_revision ON employee_revisions (revision)")
+    _create_triggers(cursor, _REVISION_TRIGGERS)
+
+
+def _add_summary_periods(connection, progress):
+    """
+    The period key (payroll.month_index) on monthly_summary and period_closings,
+    indexed with employee_id, so that "through this month" and "latest closing
+    before" lookups are index ranges instead of arithmetic on year and month. It is
+    a virtual generated column (SQLite 3.31+), so the triggers and close_periods
+    keep writing year and month and the tables are not rebuilt.
+    """
+    cursor = connection.cursor()
+    for table in ("monthly_summary", "period_closings"):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN period INTEGER "
+                       "GENERATED ALWAYS AS (year * 12 + month - 1) VIRTUAL")
+        cursor.execute(f"CREATE INDEX idx_{table}_employee_period ON {table} (employee_id, period)")
+
+
+MIGRATIONS = [
+    Migration("Temel tablolar", _create_base_tables),
+    Migration("Aylık özet tablosu", _create_monthly_summary),
+    Migration("Dönem kapanışları", _create_period_closings),
+    Migration("Çalışan arama dizini", _create_employee_search),
+    Migration("Tutarlar kuruş olarak", _store_kurus),
+    Migration("Ay anahtarları", _add_period_keys),
+    Migration("Çalışan değişiklikleri", _create_employee_revisions),
+    Migration("Özet dönem anahtarları", _add_summary_periods),
+]
+
+CURRENT_VERSION = len(MIGRATIONS)
+
+# Database pages copied per step of the backup
+BACKUP_PAGES = 1024
+
+
+def schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(connection):
+    """Migrations the database still needs, in order; raises MigrationError if it is newer than this version"""
+    version = schema_version(connection)
+    if version > CURRENT_VERSION:
+        raise MigrationError(f"Veritabanı bu uygulamadan daha yeni bir sürümde (sürüm {version}, "
+                             f"desteklenen {CURRENT_VERSION}); uygulamayı güncelleyin")
+    return MIGRATIONS[version:]
+
+
+def backup(connection, progress=None):
+    """
+    Copies the database next to itself with SQLite's online backup, named after its
+    version and the time; returns the backup's path, or None for in-memory databases
+    """
+    path = connection.execute("PRAGMA database_list").fetchone()[2]
+    if not path:
+        return None
+    backup_path = f"{path}.v{schema_version(connection)}-{time.strftime('%Y%m%d-%H%M%S')}.bak"
+    target = sqlite3.connect(backup_path)
+    try:
+        def copied(status, remaining, total):
+            if progress is not None:
+                progress(total - remaining, total)
+
+        connection.backup(target, pages=BACKUP_PAGES, progress=copied)
+    except BaseException:
+        target.close()
+        os.remove(backup_path)
+        raise
+    target.close()
+    return backup_path
+
+
+def print_progress(text, done, total):
+    """progress callback of the command line: each step's text, then its percentage"""
+    if total:
+        print(f"\r{text}: %{done * 100 // total}", end="\n" if done >= total else "", file=sys.stderr, flush=True)
+    elif not done:
+        print(text, file=sys.stderr)
+
+
+def _is_empty(connection):
+    return connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+
+
+def migrate(connection, progress=None):
+    """
+    Brings the database to CURRENT_VERSION and returns the number of migrations run.
+    progress(text, done, total), if given, is told what is being done: the backup,
+    then each migration by its description.
+    """
+    pending = pending_migrations(connection)
+    if not pending:
+        return 0
+    version = CURRENT_VERSION - len(pending)
+
+    def report(text):
+        if progress is None:
+            return None
+        progress(text, 0, 0)
+        return lambda done, total: progress(text, done, total)
+
+    if not _is_empty(connection):
+        backup(connection, report("Veritabanı yedekleniyor"))
+
+    connection.commit()
+    connection.execute("PRAGMA foreign_keys = OFF")
+    try:
+        for migration in pending:
+            version += 1
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                migration.apply(connection, report(migration.description))
+                violations = connection.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    raise MigrationError(f"Sürüm {version} geçişi yabancı anahtarları bozdu: {violations[:5]}")
+                connection.execute(f"PRAGMA user_version = {version}")
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+    finally:
+        connection.execute("PRAGMA foreign_keys = ON")
+    return len(pending)
@@ -0,0 +1,38 @@
+"""
+Money amounts are integers in kuruş (1 TL = 100 kuruş) in the database and in
+every calculation, so sums are exact and balances that should be zero are zero.
+Lira only appear at the edges: text typed into or shown by the GUI and the files
+the command-line tools read and write. Proration, the only division, rounds half
+up to the kuruş (payroll.prorate).
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+
+KURUS_PER_LIRA = 100
+
+
+def to_kurus(value):
+    """
+    Kuruş of an amount of lira given as text ("1500.5") or a number, rounded half up
+    to the kuruş; raises ValueError if it is not a number
+    """
+    text = value.strip() if isinstance(value, str) else str(value)
+    try:
+        lira = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"geçersiz tutar: {value!r}")
+    if not lira.is_finite():
+        raise ValueError(f"geçersiz tutar: {value!r}")
+    return int((lira * KURUS_PER_LIRA).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_lira(kurus):
+    """Amount in lira as a float, for numbers in exported files"""
+    return kurus / KURUS_PER_LIRA
+
+
+def format_money(kurus):
+    """Amount in lira with two decimals ("1234.50"), as the GUI shows amounts"""
+    sign = "-" if kurus < 0 else ""
+    lira, rest = divmod(abs(int(kurus)), KURUS_PER_LIRA)
+    return f"{sign}{lira}.{rest:02d}"
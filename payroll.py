@@ -0,0 +1,353 @@
+"""
+Payroll rules of the salary tracker: prorated first month, per-month salary
+overrides, carried salary and remaining salary.
+
+This module has no Qt or database dependencies. Dates are datetime.date objects
+and nothing reads the clock: callers pass the month (or the "as of" date) they
+are asking about, so the rules can be batch-run and benchmarked headless.
+Amounts are integer kuruş (see money.py).
+"""
+import calendar
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, timedelta
+
+
+MonthSummary = namedtuple("MonthSummary", "year month salary earned advances carried remaining")
+
+# One pay period of a final settlement; full periods earn the whole salary,
+# the last partial one salary / 30 per day (prorate)
+SettlementPeriod = namedtuple("SettlementPeriod", "start end days amount full")
+
+# advances: (year, month, total) of every month in the settled range with advances
+Settlement = namedtuple("Settlement", "periods total_salary advances total_advances net")
+
+
+def month_index(month, year):
+    """Number of months since year 0, so consecutive months differ by one"""
+    return year * 12 + month - 1
+
+
+def month_from_index(index):
+    """Inverse of month_index, returns (year, month)"""
+    year, month = divmod(index, 12)
+    return year, month + 1
+
+
+def days_in_month(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def prorate(salary, days):
+    """salary / 30 * days in kuruş, rounded half up to the kuruş; exact integer arithmetic"""
+    return (salary * days * 2 + 30) // 60
+
+
+def prorated_salary(salary, start_date, month, year):
+    """
+    Salary earned in the given month by someone who started on start_date: nothing
+    before the start month, the salary prorated over 30 days in the start month
+    (unless they started on the 1st) and the full salary after it.
+    """
+    if (year, month) < (start_date.year, start_date.month):
+        return 0
+    if (year, month) == (start_date.year, start_date.month) and start_date.day != 1:
+        days_worked = days_in_month(year, month) - start_date.day + 1
+        return prorate(salary, days_worked)
+    return salary
+
+
+def visible_months(start_date, as_of):
+    """Months of as_of's year that have a tab: from the start month in the first year, all twelve after"""
+    if as_of.year == start_date.year:
+        return list(range(start_date.month, 13))
+    return list(range(1, 13))
+
+
+def period_start(start_date, k):
+    """
+    Start of the k-th pay period of someone who started on start_date. Periods run
+    from the start day to the day before it in the next month; in months too short
+    for the start day the period starts on the month's last day.
+    """
+    year, month = month_from_index(month_index(start_date.month, start_date.year) + k)
+    return date(year, month, min(start_date.day, days_in_month(year, month)))
+
+
+def settle(start_date, end_date, salary_for_month, advances):
+    """
+    Final settlement (hak ediş) for employment from start_date to end_date inclusive.
+
+    The number of full pay periods follows from the month difference, so the
+    breakdown is computed period by period without walking the calendar and without
+    any limit on the length of service. salary_for_month(month, year) gives the
+    salary of the month a period starts in; advances maps (year, month) to advance
+    totals, and all advances from the start month through the end month are deducted.
+    """
+    # Full periods are those ending (the day before the next one starts) by end_date
+    full = month_index(end_date.month, end_date.year) - month_index(start_date.month, start_date.year) + 1
+    while full > 0 and period_start(start_date, full) > end_date + timedelta(days=1):
+        full -= 1
+
+    periods = []
+    for k in range(full):
+        start = period_start(start_date, k)
+        end = period_start(start_date, k + 1) - timedelta(days=1)
+        salary = salary_for_month(start.month, start.year)
+        periods.append(SettlementPeriod(start, end, (end - start).days + 1, salary, True))
+    last_start = period_start(start_date, full)
+    if last_start <= end_date:
+        days = (end_date - last_start).days + 1
+        prorated = prorate(salary_for_month(last_start.month, last_start.year), days)
+        periods.append(SettlementPeriod(last_start, end_date, days, prorated, False))
+
+    first, last = (start_date.year, start_date.month), (end_date.year, end_date.month)
+    advance_months = sorted((year, month, total) for (year, month), total in advances.items()
+                            if first <= (year, month) <= last and total)
+    total_salary = sum(period.amount for period in periods)
+    total_advances = sum(total for _, _, total in advance_months)
+    return Settlement(periods, total_salary, advance_months, total_advances, total_salary - total_advances)
+
+
+def pay_day(start_day, year, month):
+    """Day of the month salary is due for someone who started on start_day: the same day, or the month's last day"""
+    return min(start_day, days_in_month(year, month))
+
+
+class PayDayIndex:
+    """
+    Employees by pay day, so the employees due on a date are found without scanning
+    everyone. Each employee is kept under their start day; on a month's last day the
+    employees whose start day the month does not have (29-31) are due as well.
+    """
+
+    def __init__(self):
+        self._by_day = {}  # start day -> {employee_id: (start_date, data)}
+        self._day_of = {}  # employee_id -> start day
+
+    def add(self, employee_id, start_date, data=None):
+        """Adds or replaces an employee; data is handed back by due_on"""
+        self.remove(employee_id)
+        self._by_day.setdefault(start_date.day, {})[employee_id] = (start_date, data)
+        self._day_of[employee_id] = start_date.day
+
+    def remove(self, employee_id):
+        day = self._day_of.pop(employee_id, None)
+        if day is not None:
+            del self._by_day[day][employee_id]
+
+    def clear(self):
+        self._by_day.clear()
+        self._day_of.clear()
+
+    def __len__(self):
+        return len(self._day_of)
+
+    def due_on(self, day_date):
+        """(employee_id, data) of the employees whose salary is due on day_date, not counting their start date"""
+        last_day = days_in_month(day_date.year, day_date.month)
+        days = range(day_date.day, 32) if day_date.day == last_day else (day_date.day,)
+        due = []
+        for day in days:
+            for employee_id, (start_date, data) in self._by_day.get(day, {}).items():
+                if start_date < day_date:
+                    due.append((employee_id, data))
+        return due
+
+    def next_due_date(self, after):
+        """First date from after on with employees due, or None if there are none"""
+        for offset in range(62):
+            day_date = after + timedelta(days=offset)
+            if self.due_on(day_date):
+                return day_date
+        return None
+
+
+def first_changed_index(old, new):
+    """
+    month_index of the first month whose balance differs between two
+    PayrollLedger.totals(), or None if they are the same; a different start date
+    or base salary changes every month (-1)
+    """
+    if old is None or old[:2] != new[:2]:
+        return -1
+    changed = None
+    for old_months, new_months in zip(old[2:], new[2:]):
+        if old_months is new_months or old_months == new_months:
+            continue
+        for key in old_months.keys() | new_months.keys():
+            if old_months.get(key) != new_months.get(key):
+                index = month_index(key[1], key[0])
+                if changed is None or index < changed:
+                    changed = index
+    return changed
+
+
+class CarryCache:
+    """
+    Cumulative balances keyed by (employee_id, year, month).
+
+    Each employee's balances are stored as a prefix-sum list starting at the month
+    after their latest period closing (their start month if there is none), so a
+    lookup is O(1) and invalidating a month only truncates the entries from that
+    month onwards. The list remembers the totals it was summed from: a ledger whose
+    totals differ (e.g. re-read after another connection changed the employee's
+    rows) only drops the entries from the first month that differs.
+    """
+
+    def __init__(self):
+        # employee_id -> [start month index, opening balance, [balance per month], totals]
+        self._balances = {}
+
+    def balances(self, employee_id, start_index, opening=0, totals=None):
+        """
+        Returns the mutable balance list of an employee summed from opening at
+        start_index, resetting it if either moved and truncating it from the first
+        month where totals (PayrollLedger.totals) differ from those it was summed from
+        """
+        cached = self._balances.get(employee_id)
+        if cached is None or cached[0] != start_index or cached[1] != opening:
+            cached = [start_index, opening, [], totals]
+            self._balances[employee_id] = cached
+        elif cached[3] is not totals:
+            changed = first_changed_index(cached[3], totals) if totals is not None else None
+            if changed is not None:
+                del cached[2][max(0, changed - start_index):]
+            if totals is not None:
+                cached[3] = totals
+        return cached[2]
+
+    def get(self, employee_id, year, month):
+        cached = self._balances.get(employee_id)
+        if cached is None:
+            return None
+        offset = month_index(month, year) - cached[0]
+        if 0 <= offset < len(cached[2]):
+            return cached[2][offset]
+        return None
+
+    def invalidate(self, employee_id, month=None, year=None):
+        """Drops the balances of an employee from the given month onwards (all of them if no month)"""
+        cached = self._balances.get(employee_id)
+        if cached is None:
+            return
+        if month is None:
+            del self._balances[employee_id]
+            return
+        offset = max(0, month_index(month, year) - cached[0])
+        del cached[2][offset:]
+
+
+carry_cache = CarryCache()
+
+
+class PayrollLedger:
+    """
+    One employee's salary overrides and advance totals with the payroll rules applied.
+
+    salaries maps (year, month) to a salary override, advances maps (year, month) to
+    the sum of that month's advances; months missing from either fall back to the
+    base salary and to no advances. closings maps (year, month) to the balance
+    through that month stored by a period closing; balances are summed from the
+    latest closing before the month asked about, so their cost does not grow with
+    the length of service.
+    """
+
+    def __init__(self, employee_id, start_date, base_salary, salaries=None, advances=None, cache=None,
+                 closings=None):
+        self.employee_id = employee_id
+        self.start_date = start_date
+        self.base_salary = base_salary
+        self.salaries = salaries or {}
+        self.advances = advances or {}
+        self.cache = carry_cache if cache is None else cache
+        self.set_closings(closings or {})
+
+    def set_closings(self, closings):
+        self.closings = closings
+        self._closing_indexes = sorted(month_index(month, year) for year, month in closings)
+
+    def opening_balance(self, index):
+        """
+        (first month index, balance before it) to sum the balance through the month
+        index from: the month after the latest closing up to it, or the start month
+        """
+        start_index = month_index(self.start_date.month, self.start_date.year)
+        position = bisect_right(self._closing_indexes, index)
+        if position:
+            closing_index = self._closing_indexes[position - 1]
+            if closing_index >= start_index:
+                return closing_index + 1, self.closings[month_from_index(closing_index)]
+        return start_index, 0
+
+    def totals(self):
+        """What the balances are summed from, for the carry cache to tell whether they are current"""
+        return self.start_date, self.base_salary, self.salaries, self.advances
+
+    def get_salary_for_month(self, month, year):
+        return self.salaries.get((year, month), self.base_salary)
+
+    def total_advances_for_month(self, month, year):
+        return self.advances.get((year, month), 0)
+
+    def earned_salary_for_month(self, month, year):
+        return prorated_salary(self.get_salary_for_month(month, year), self.start_date, month, year)
+
+    def unpaid_salary_for_month(self, month, year):
+        """Earned salary of the month not yet covered by that month's advances"""
+        return max(0, self.earned_salary_for_month(month, year) - self.total_advances_for_month(month, year))
+
+    def balance_through_month(self, month, year):
+        """
+        Cumulative balance (earned salary minus advances) from the start month through
+        the given month. Balances are kept in the carry cache, so repeated lookups are
+        O(1) and only months after the last cached one (or the last closing) are summed.
+        """
+        index = month_index(month, year)
+        if index < month_index(self.start_date.month, self.start_date.year):
+            return 0
+        first_index, opening = self.opening_balance(index)
+        offset = index - first_index
+        if offset < 0:
+            # The month is closed
+            return opening
+        balances = self.cache.balances(self.employee_id, first_index, opening, self.totals())
+        while len(balances) <= offset:
+            balance_year, balance_month = month_from_index(first_index + len(balances))
+            previous = balances[-1] if balances else opening
+            balances.append(previous
+                            + (self.earned_salary_for_month(balance_month, balance_year)
+                               - self.total_advances_for_month(balance_month, balance_year)))
+        return balances[offset]
+
+    def carried_salary_for_month(self, target_month, year):
+        """
+        Calculates the total carried salary for all months from the start month up to
+        (but not including) target_month (1-based) of the given year.
+        """
+        if target_month < 1 or target_month > 12:
+            return 0
+        previous_year, previous_month = month_from_index(month_index(target_month, year) - 1)
+        return self.balance_through_month(previous_month, previous_year)
+
+    def remaining_salary_for_month(self, month, year):
+        # Start month has no carry; later months add what is carried from earlier months
+        return self.balance_through_month(month, year)
+
+    def month_summary(self, month, year):
+        return MonthSummary(
+            year, month,
+            self.get_salary_for_month(month, year),
+            self.earned_salary_for_month(month, year),
+            self.total_advances_for_month(month, year),
+            self.carried_salary_for_month(month, year),
+            self.remaining_salary_for_month(month, year),
+        )
+
+    def settle(self, end_date):
+        """Final settlement of this employee leaving on end_date"""
+        return settle(self.start_date, end_date, self.get_salary_for_month, self.advances)
+
+    def invalidate(self, month=None, year=None):
+        """Drops cached balances from the given month onwards, after salaries or advances changed"""
+        self.cache.invalidate(self.employee_id, month, year)
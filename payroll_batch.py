@@ -0,0 +1,356 @@
+"""
+Month-end payroll run for every employee, without the GUI.
+
+    python main.py payroll --year 2026 --month 9 [--format csv|json] [--backend python|numpy]
+
+Salaries, carry and remaining are computed with the rules in payroll.py from two
+queries (employees and their monthly_summary rows), both ordered by employee so
+they can be merged while streaming. Only one employee's rows are in
+memory at a time, and results are written to stdout as they are computed.
+
+Final settlements (hak ediş) for employees leaving on given dates, same formats:
+
+    python main.py hak-edis --date 31.10.2026 12 15 [--file cikislar.csv]
+
+Period closing catch-up, storing the balances of every year end (or month end
+with --monthly) that is not closed yet, through the given month:
+
+    python main.py close-periods [--year 2025 --month 12] [--monthly]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date
+from itertools import groupby
+from operator import itemgetter
+
+from database import period_closings, summary_totals
+from money import to_lira
+from payroll import CarryCache, PayrollLedger, month_from_index, month_index, settle
+
+
+FIELDS = ("employee_id", "first_name", "last_name", "year", "month",
+          "salary", "earned", "advances", "carried", "remaining")
+
+SETTLEMENT_FIELDS = ("employee_id", "first_name", "last_name", "start_date", "end_date",
+                     "periods", "total_salary", "total_advances", "net")
+
+# Employees settled per batch of queries; stays below SQLite's bound parameter limit
+SETTLEMENT_CHUNK = 500
+
+
+def payroll_row(employee_id, first_name, last_name, month, year, salary, earned, advances, carried, remaining):
+    """One output row; amounts are kuruş, written as lira"""
+    return {
+        "employee_id": employee_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "year": year,
+        "month": month,
+        "salary": to_lira(salary),
+        "earned": to_lira(earned),
+        "advances": to_lira(advances),
+        "carried": to_lira(carried),
+        "remaining": to_lira(remaining),
+    }
+
+
+class _EmployeeRows:
+    """Walks rows ordered by employee id, handing out one employee's rows at a time"""
+
+    def __init__(self, rows):
+        self._groups = groupby(rows, key=itemgetter(0))
+        self._ahead = next(self._groups, None)
+
+    def take(self, employee_id):
+        while self._ahead is not None and self._ahead[0] < employee_id:
+            self._ahead = next(self._groups, None)
+        if self._ahead is None or self._ahead[0] != employee_id:
+            return []
+        rows = list(self._ahead[1])
+        self._ahead = next(self._groups, None)
+        return rows
+
+
+def iter_ledgers(connection, month, year, first_index=None):
+    """
+    Yields (first_name, last_name, PayrollLedger) for every employee in id order,
+    with the salaries and advances through the given month. Rows after that month
+    are not read since they cannot affect its carry or remaining salary.
+
+    Only months from first_index (a month_index, the given month by default) on are
+    asked about, so each ledger gets the employee's latest period closing before
+    it and only the rows after that closing; the rows read do not grow with the
+    length of service once periods are closed.
+    """
+    target_index = month_index(month, year)
+    if first_index is None:
+        first_index = target_index
+
+    employees = connection.cursor()
+    employees.execute("SELECT id, first_name, last_name, start_date, salary FROM employees ORDER BY id")
+    closings = connection.cursor()
+    # Per employee, the latest closing's period and the months after it are index
+    # ranges on (employee_id, period); the closing row itself is a primary key lookup
+    closings.execute("""
+        SELECT c.employee_id, c.year, c.month, c.balance FROM (
+            SELECT e.id, (
+                SELECT MAX(period) FROM period_closings WHERE employee_id = e.id AND period < :first
+            ) AS closed
+            FROM employees AS e
+        ) AS latest
+        JOIN period_closings AS c
+          ON c.employee_id = latest.id AND c.year = latest.closed / 12 AND c.month = latest.closed % 12 + 1
+        ORDER BY latest.id
+    """, {"first": first_index})
+    months = connection.cursor()
+    months.execute("""
+        SELECT s.employee_id, s.year, s.month, s.salary, s.advances_total, s.advances_count
+        FROM employees AS e
+        JOIN monthly_summary AS s ON s.employee_id = e.id AND s.period <= :target AND s.period > COALESCE((
+            SELECT MAX(period) FROM period_closings WHERE employee_id = e.id AND period < :first
+        ), -1)
+        ORDER BY e.id
+    """, {"target": target_index, "first": first_index})
+
+    closing_rows = _EmployeeRows(closings)
+    month_rows = _EmployeeRows(months)
+    for employee_id, first_name, last_name, start_date, base_salary in employees:
+        salaries, advances = summary_totals(month_rows.take(employee_id))
+        yield first_name, last_name, PayrollLedger(
+            employee_id, date.fromisoformat(start_date), base_salary, salaries, advances,
+            # Each balance is used once, so don't keep it in the shared cache
+            cache=CarryCache(),
+            closings=period_closings(closing_rows.take(employee_id)),
+        )
+
+
+def summary_row(first_name, last_name, ledger, month, year):
+    """payroll_row of a ledger's month"""
+    summary = ledger.month_summary(month, year)
+    return payroll_row(ledger.employee_id, first_name, last_name, month, year, summary.salary,
+                       summary.earned, summary.advances, summary.carried, summary.remaining)
+
+
+def iter_payroll(connection, month, year):
+    """Yields a dict with FIELDS for every employee, for the given month"""
+    for first_name, last_name, ledger in iter_ledgers(connection, month, year):
+        yield summary_row(first_name, last_name, ledger, month, year)
+
+
+def close_periods(connection, month, year, monthly=False):
+    """
+    Catch-up job: stores the balance of every employee at the end of every year
+    (every month if monthly) from their start through the given month that comes
+    after their latest closing. Closings deleted by the triggers after a change
+    to an earlier month are recreated the same way. The balances are read and
+    written in one write transaction, so a change committed meanwhile cannot fire
+    its reopening trigger before the stale closing is written. Returns the number
+    of closings written.
+    """
+    target_index = month_index(month, year)
+    cursor = connection.cursor()
+    connection.commit()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        rows = []
+        for _, _, ledger in iter_ledgers(connection, month, year, first_index=target_index + 1):
+            start_index = month_index(ledger.start_date.month, ledger.start_date.year)
+            closed_index = max(ledger.opening_balance(target_index)[0], start_index)
+            for index in range(closed_index, target_index + 1):
+                closing_year, closing_month = month_from_index(index)
+                if monthly or closing_month == 12:
+                    balance = ledger.balance_through_month(closing_month, closing_year)
+                    rows.append((ledger.employee_id, closing_year, closing_month, balance))
+        cursor.executemany("INSERT OR REPLACE INTO period_closings (employee_id, year, month, balance) "
+                           "VALUES (?, ?, ?, ?)", rows)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return len(rows)
+
+
+def last_closable_month(today=None, monthly=False):
+    """(month, year) the catch-up closes through: the last finished year, or month if monthly"""
+    today = today or date.today()
+    if monthly:
+        return month_from_index(month_index(today.month, today.year) - 1)[::-1]
+    return 12, today.year - 1
+
+
+def iter_settlements(connection, terminations):
+    """
+    Yields a dict with SETTLEMENT_FIELDS for every (employee_id, end_date) of
+    terminations, in the given order. Employees are settled in chunks, each reading
+    the chunk's employees and their monthly_summary rows with one query apiece.
+    Unknown employee ids are reported on stderr and skipped.
+    """
+    terminations = list(terminations)
+    for offset in range(0, len(terminations), SETTLEMENT_CHUNK):
+        chunk = terminations[offset:offset + SETTLEMENT_CHUNK]
+        ids = sorted({employee_id for employee_id, _ in chunk})
+        placeholders = ",".join("?" * len(ids))
+        cursor = connection.cursor()
+
+        cursor.execute(f"SELECT id, first_name, last_name, start_date, salary FROM employees "
+                       f"WHERE id IN ({placeholders})", ids)
+        employees = {row[0]: row[1:] for row in cursor.fetchall()}
+        cursor.execute(f"""
+            SELECT employee_id, year, month, salary, advances_total, advances_count FROM monthly_summary
+            WHERE employee_id IN ({placeholders})
+            ORDER BY employee_id
+        """, ids)
+        totals = {employee_id: summary_totals(rows)
+                  for employee_id, rows in groupby(cursor.fetchall(), key=itemgetter(0))}
+
+        for employee_id, end_date in chunk:
+            if employee_id not in employees:
+                print(f"Çalışan bulunamadı: {employee_id}", file=sys.stderr)
+                continue
+            first_name, last_name, start_date, base_salary = employees[employee_id]
+            start_date = date.fromisoformat(start_date)
+            if end_date < start_date:
+                print(f"Çıkış tarihi işe başlama tarihinden önce: {employee_id}", file=sys.stderr)
+                continue
+            overrides, advances = totals.get(employee_id, ({}, {}))
+            settlement = settle(start_date, end_date,
+                                lambda month, year: overrides.get((year, month), base_salary), advances)
+            yield {
+                "employee_id": employee_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "periods": len(settlement.periods),
+                "total_salary": to_lira(settlement.total_salary),
+                "total_advances": to_lira(settlement.total_advances),
+                "net": to_lira(settlement.net),
+            }
+
+
+def parse_date(text):
+    """Accepts GG.AA.YYYY as typed in the GUI, or YYYY-MM-DD"""
+    text = text.strip()
+    try:
+        if "." in text:
+            day, month, year = map(int, text.split("."))
+            return date(year, month, day)
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"geçersiz tarih: {text}")
+
+
+def read_terminations(path):
+    """Reads employee_id,date rows (header optional) from a CSV file"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.reader(handle):
+            if not row or not row[0].strip() or not row[0].strip().isdigit():
+                continue
+            yield int(row[0]), parse_date(row[1])
+
+
+def write_csv(rows, out, fields=FIELDS):
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_json(rows, out):
+    """Writes a JSON array one element per line, without collecting the rows first"""
+    out.write("[")
+    separator = "\n"
+    for row in rows:
+        out.write(separator)
+        out.write(json.dumps(row, ensure_ascii=False))
+        separator = ",\n"
+    out.write("\n]\n")
+
+
+def stream(write, rows, out, *args):
+    """
+    Writes the rows with write(rows, out, ...) and returns the exit code; a reader
+    that stops early (e.g. `| head`) ends the output quietly instead of with a traceback
+    """
+    try:
+        write(rows, out, *args)
+        out.flush()
+    except BrokenPipeError:
+        if out is sys.stdout:
+            # Python flushes stdout again at exit; send what is left to devnull
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+def main(argv, connection, out=None):
+    parser = argparse.ArgumentParser(prog="main.py payroll",
+                                     description="Tüm çalışanlar için aylık maaş dökümü")
+    today = date.today()
+    parser.add_argument("--year", type=int, default=today.year)
+    parser.add_argument("--month", type=int, default=today.month, choices=range(1, 13), metavar="1-12")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("--backend", choices=("python", "numpy"), default="python",
+                        help="numpy: tüm çalışanları dizi işlemleriyle hesaplar (NumPy gerekir)")
+    args = parser.parse_args(argv)
+
+    out = out or sys.stdout
+    if args.backend == "numpy":
+        try:
+            import payroll_numpy
+        except ImportError:
+            parser.error("--backend numpy için NumPy kurulu olmalıdır")
+        rows = payroll_numpy.iter_payroll(connection, args.month, args.year)
+    else:
+        rows = iter_payroll(connection, args.month, args.year)
+    if args.format == "json":
+        return stream(write_json, rows, out)
+    return stream(write_csv, rows, out)
+
+
+def close_main(argv, connection):
+    parser = argparse.ArgumentParser(prog="main.py close-periods",
+                                     description="Kapatılmamış dönemlerin devir bakiyelerini kaydeder")
+    parser.add_argument("--monthly", action="store_true", help="yıl sonları yerine her ay sonunu kapatır")
+    parser.add_argument("--year", type=int, help="kapatılacak son dönemin yılı (varsayılan: geçen yıl)")
+    parser.add_argument("--month", type=int, choices=range(1, 13), metavar="1-12",
+                        help="kapatılacak son dönemin ayı (varsayılan: aralık, --monthly ile geçen ay)")
+    args = parser.parse_args(argv)
+    month, year = last_closable_month(monthly=args.monthly)
+    if args.year is not None:
+        year, month = args.year, args.month or 12
+    elif args.month is not None:
+        parser.error("--month için --year gerekir")
+    count = close_periods(connection, month, year, args.monthly)
+    print(f"{count} dönem kapatıldı ({month:02d}.{year} dahil)")
+    return 0
+
+
+def settlement_main(argv, connection, out=None):
+    parser = argparse.ArgumentParser(prog="main.py hak-edis",
+                                     description="Çıkış tarihlerine göre hak ediş hesaplama")
+    parser.add_argument("employees", type=int, nargs="*", metavar="ID")
+    parser.add_argument("--date", type=parse_date, help="ID ile verilen çalışanların çıkış tarihi")
+    parser.add_argument("--file", help="employee_id,tarih satırlarından oluşan CSV dosyası")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    args = parser.parse_args(argv)
+    if args.employees and args.date is None:
+        parser.error("ID ile verilen çalışanlar için --date gerekir")
+    if not args.employees and not args.file:
+        parser.error("en az bir çalışan ID'si veya --file verilmelidir")
+
+    terminations = [(employee_id, args.date) for employee_id in args.employees]
+    if args.file:
+        try:
+            terminations.extend(read_terminations(args.file))
+        except (OSError, IndexError, argparse.ArgumentTypeError) as e:
+            parser.error(f"{args.file} okunamadı: {e}")
+
+    out = out or sys.stdout
+    rows = iter_settlements(connection, terminations)
+    if args.format == "json":
+        return stream(write_json, rows, out)
+    return stream(write_csv, rows, out, SETTLEMENT_FIELDS)
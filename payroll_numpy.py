@@ -0,0 +1,127 @@
+"""
+Vectorized payroll backend for the whole roster (optional, requires NumPy).
+
+Instead of walking months per employee, salaries and advance sums are loaded into
+employee x month arrays covering the earliest start month up to the requested month.
+Proration, carry (a cumsum along the month axis) and remaining are then a handful of
+array operations for all employees at once. Amounts are int64 kuruş and proration
+rounds like payroll.prorate, so the results are identical to the scalar path.
+
+    python main.py payroll --year 2026 --month 9 --backend numpy
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from payroll import month_index
+from payroll_batch import payroll_row
+
+
+# employees: (id, first_name, last_name) tuples ordered by id; ids, start_index,
+# start_day and base_salary: arrays aligned with them; overrides: (employee_id,
+# month index, salary) rows; sums: (employee_id, month index, advance total) rows
+Roster = namedtuple("Roster", "employees ids start_index start_day base_salary overrides sums")
+
+
+def load_roster(connection, month, year):
+    """Reads everything needed for the month's payroll into arrays"""
+    target_index = month_index(month, year)
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT id, first_name, last_name,
+               CAST(substr(start_date, 1, 4) AS INTEGER) * 12 + CAST(substr(start_date, 6, 2) AS INTEGER) - 1,
+               CAST(substr(start_date, 9, 2) AS INTEGER), salary
+        FROM employees ORDER BY id
+    """)
+    rows = cursor.fetchall()
+    employees = [row[:3] for row in rows]
+    count = len(rows)
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    start_index = np.fromiter((row[3] for row in rows), dtype=np.int64, count=count)
+    start_day = np.fromiter((row[4] for row in rows), dtype=np.int64, count=count)
+    base_salary = np.fromiter((row[5] for row in rows), dtype=np.int64, count=count)
+
+    cursor.execute("""
+        SELECT employee_id, period, salary FROM monthly_summary
+        WHERE salary IS NOT NULL AND period <= ?
+    """, (target_index,))
+    overrides = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+    cursor.execute("""
+        SELECT employee_id, period, advances_total FROM monthly_summary
+        WHERE advances_count > 0 AND period <= ?
+    """, (target_index,))
+    sums = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+    return Roster(employees, ids, start_index, start_day, base_salary, overrides, sums)
+
+
+def roster_balances(roster, month, year):
+    """
+    Computes the month's figures for every employee of the roster. Returns a dict
+    mapping salary, earned, advances, carried and remaining to arrays aligned with
+    roster.employees.
+    """
+    target_index = month_index(month, year)
+    ids, start_index, start_day = roster.ids, roster.start_index, roster.start_day
+    overrides, sums = roster.overrides, roster.sums
+    count = len(ids)
+
+    # Month axis: column 0 is the earliest start month, the last column the requested month
+    first_index = int(start_index.min()) if count else target_index
+    first_index = min(first_index, target_index)
+    months = target_index - first_index + 1
+
+    salary = np.repeat(roster.base_salary[:, None], months, axis=1)
+    overrides = overrides[overrides[:, 1] >= first_index]
+    rows_of = np.searchsorted(ids, overrides[:, 0])
+    known = (rows_of < count) & (ids[np.minimum(rows_of, count - 1)] == overrides[:, 0])
+    salary[rows_of[known], overrides[known, 1] - first_index] = overrides[known, 2]
+
+    advances = np.zeros((count, months), dtype=np.int64)
+    rows_of = np.searchsorted(ids, sums[:, 0])
+    columns = sums[:, 1] - first_index
+    # Orphaned advances and months before the earliest start month never count
+    known = ((rows_of < count) & (ids[np.minimum(rows_of, count - 1)] == sums[:, 0])
+             & (columns >= 0))
+    advances[rows_of[known], columns[known]] = sums[known, 2]
+
+    # Earned salary: nothing before the start month, prorated over 30 days in it
+    offsets = np.arange(months)[None, :]
+    start_column = (start_index - first_index)[:, None]
+    earned = np.where(offsets < start_column, 0, salary)
+    prorated = (start_day != 1) & (start_index <= target_index)
+    rows_prorated = np.nonzero(prorated)[0]
+    columns_prorated = start_index[prorated] - first_index
+    days_in_start_month = _days_in_month(start_index[prorated])
+    days_worked = days_in_start_month - start_day[prorated] + 1
+    # payroll.prorate: salary / 30 * days rounded half up to the kuruş
+    earned[rows_prorated, columns_prorated] = (salary[rows_prorated, columns_prorated] * days_worked * 2 + 30) // 60
+
+    # Balances start at the start month, advances dated before it are not counted
+    net = np.where(offsets < start_column, 0, earned - advances)
+    balance = np.cumsum(net, axis=1)
+    remaining = balance[:, -1]
+    carried = balance[:, -2] if months > 1 else np.zeros(count, dtype=np.int64)
+    return {
+        "salary": salary[:, -1],
+        "earned": earned[:, -1],
+        "advances": advances[:, -1],
+        "carried": carried,
+        "remaining": remaining,
+    }
+
+
+def _days_in_month(indexes):
+    """Days in the months given as month_index values"""
+    # datetime64[M] counts months since 1970-01
+    first = (indexes - 1970 * 12).astype("datetime64[M]")
+    return ((first + 1).astype("datetime64[D]") - first.astype("datetime64[D]")).astype(np.int64)
+
+
+def iter_payroll(connection, month, year):
+    """Same rows as payroll_batch.iter_payroll, computed with arrays"""
+    roster = load_roster(connection, month, year)
+    employees, columns = roster.employees, roster_balances(roster, month, year)
+    values = zip(*(columns[name].tolist() for name in ("salary", "earned", "advances", "carried", "remaining")))
+    for (employee_id, first_name, last_name), figures in zip(employees, values):
+        yield payroll_row(employee_id, first_name, last_name, month, year, *figures)
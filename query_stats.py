@@ -0,0 +1,201 @@
+"""
+Query instrumentation: number of statements and time spent in SQLite per user
+action, and a rotating log of slow statements.
+
+Connections opened by database.connect() use InstrumentedConnection, whose cursors
+time execute()/executemany(), and report every statement SQLite runs after their
+settings are applied (including those run by triggers) through set_trace_callback.
+Both are attributed to the user action that is active on the calling thread;
+background queries inherit the action of the code that started them.
+
+Instrumentation is off unless OTEL_MAAS_QUERY_STATS=1 is set or it is switched on
+from the Araçlar menu. Statements taking at least OTEL_MAAS_SLOW_QUERY_MS
+milliseconds (100 by default) are written to slow_queries.log next to the
+database unless OTEL_MAAS_SLOW_QUERY_LOG names another file. Times are those of
+execute() calls; rows fetched afterwards are not included.
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+ENABLED_ENV = "OTEL_MAAS_QUERY_STATS"
+SLOW_MS_ENV = "OTEL_MAAS_SLOW_QUERY_MS"
+SLOW_LOG_ENV = "OTEL_MAAS_SLOW_QUERY_LOG"
+DEFAULT_SLOW_MS = 100
+SLOW_LOG_FILE_NAME = "slow_queries.log"
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+# Action of statements run outside any tracked action
+UNATTRIBUTED = "Diğer"
+
+
+class ActionStats:
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+
+
+class QueryStats:
+    """Per-action query counts and times, shared by all threads"""
+
+    def __init__(self, enabled=False, slow_ms=DEFAULT_SLOW_MS, log_path=None):
+        self.enabled = enabled
+        self.slow_seconds = slow_ms / 1000
+        self.log_path = log_path
+        self.actions = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+
+    def current_action(self):
+        return getattr(self._local, "action", None)
+
+    @contextmanager
+    def action(self, name, count_call=True):
+        """
+        Attributes the statements run on this thread inside the block to the action.
+        An action started inside another one is part of it (adding an advance also
+        refreshes the tabs), so only the outermost action counts.
+        """
+        if name is None or self.current_action() is not None:
+            yield
+            return
+        self._local.action = name
+        if self.enabled and count_call:
+            with self._lock:
+                self._stats(name).calls += 1
+        try:
+            yield
+        finally:
+            self._local.action = None
+
+    def tracked(self, name):
+        """
+        Decorator running a function as the action. Like Qt slots, signal arguments
+        beyond the function's own parameters (e.g. clicked's checked) are dropped.
+        """
+        def decorate(fn):
+            # Plain functions only; co_argcount avoids importing inspect at startup
+            arg_count = fn.__code__.co_argcount
+
+            @wraps(fn)
+            def wrapper(*args):
+                with self.action(name):
+                    return fn(*args[:arg_count])
+            return wrapper
+        return decorate
+
+    def _stats(self, name):
+        stats = self.actions.get(name)
+        if stats is None:
+            stats = self.actions[name] = ActionStats()
+        return stats
+
+    def traced(self, statement):
+        """Trace callback of instrumented connections, called for every statement"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stats(self.current_action() or UNATTRIBUTED).queries += 1
+
+    def timed(self, sql, parameters, seconds):
+        name = self.current_action() or UNATTRIBUTED
+        with self._lock:
+            stats = self._stats(name)
+            stats.seconds += seconds
+            stats.slowest = max(stats.slowest, seconds)
+        if seconds >= self.slow_seconds:
+            self.slow_log().warning("%.1f ms [%s] %s %.200r", seconds * 1000, name, " ".join(sql.split()),
+                                    parameters)
+
+    def slow_log(self):
+        if self._logger is None:
+            # Imported on the first slow statement, not at startup
+            import logging
+            from logging.handlers import RotatingFileHandler
+            if self.log_path is None:
+                # Imported here since database imports this module
+                from database import DB_PATH
+                self.log_path = os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), SLOW_LOG_FILE_NAME)
+            logger = logging.getLogger("otel_maas.slow_queries")
+            logger.propagate = False
+            handler = RotatingFileHandler(self.log_path, maxBytes=SLOW_LOG_MAX_BYTES,
+                                          backupCount=SLOW_LOG_BACKUPS, encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def snapshot(self):
+        """Returns (action, calls, queries, seconds, slowest seconds) tuples, most queries first"""
+        with self._lock:
+            rows = [(name, stats.calls, stats.queries, stats.seconds, stats.slowest)
+                    for name, stats in self.actions.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.actions.clear()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not query_stats.enabled:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            query_stats.timed(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not query_stats.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            query_stats.timed(sql, "executemany", time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors report their times to query_stats; pass as factory to
+    sqlite3.connect, and set query_stats.traced as its trace callback to count statements
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def slow_ms_setting():
+    """Slow statement threshold from the environment; a malformed value falls back to the default"""
+    value = os.environ.get(SLOW_MS_ENV)
+    if not value:
+        return DEFAULT_SLOW_MS
+    try:
+        return float(value)
+    except ValueError:
+        print(f"{SLOW_MS_ENV}={value!r} geçersiz, {DEFAULT_SLOW_MS} ms kullanılıyor", file=sys.stderr)
+        return DEFAULT_SLOW_MS
+
+
+query_stats = QueryStats(
+    enabled=os.environ.get(ENABLED_ENV, "") not in ("", "0"),
+    slow_ms=slow_ms_setting(),
+    log_path=os.environ.get(SLOW_LOG_ENV) or None,
+)
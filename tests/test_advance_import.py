@@ -0,0 +1,79 @@
+import pytest
+
+from advance_import import AdvanceImportError, import_advances
+from database import connect
+from migrations import migrate
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = connect(str(tmp_path / "otel_maas.db"))
+    migrate(connection)
+    connection.executemany("INSERT INTO employees (first_name, last_name, start_date, salary) VALUES (?, ?, ?, ?)", [
+        ("Ayşe", "Yılmaz", "2025-03-10", 2500000),
+        ("Mehmet", "Çelik", "2026-01-01", 3000000),
+        ("Ali", "Kaya", "2024-01-01", 2000000),
+        ("Ali", "Kaya", "2024-06-01", 2000000),
+    ])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def write_file(tmp_path, text):
+    path = tmp_path / "avanslar.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def advance_rows(connection):
+    return connection.execute(
+        "SELECT employee_id, date, period, amount, description FROM advances ORDER BY id").fetchall()
+
+
+def test_imports_valid_rows(tmp_path, connection):
+    path = write_file(tmp_path, "çalışan;tarih;tutar;açıklama\n"
+                                "ayşe  YILMAZ;05.04.2026;1.500,50;Kira\n"
+                                "2;2026-02-01;750\n")
+    assert import_advances(connection, path) == (2, {1, 2})
+    assert advance_rows(connection) == [
+        (1, "2026-04-05", 2026 * 12 + 3, 150050, "Kira"),
+        (2, "2026-02-01", 2026 * 12 + 1, 75000, ""),
+    ]
+    assert connection.execute("SELECT advances_total FROM monthly_summary WHERE employee_id = 1").fetchall() == [
+        (150050,),
+    ]
+
+
+@pytest.mark.parametrize("line, message", [
+    ("Veli Demir,05.04.2026,100", "çalışan bulunamadı"),
+    ("99,05.04.2026,100", "çalışan bulunamadı"),
+    ("Ali Kaya,05.04.2026,100", "birden fazla çalışan"),
+    ("1,31.02.2026,100", "geçersiz tarih"),
+    ("1,2026-13-01,100", "geçersiz tarih"),
+    ("1,dün,100", "geçersiz tarih"),
+    ("1,05.04.2026,yüz", "geçersiz tutar"),
+    ("1,05.04.2026,1.5.0", "geçersiz tutar"),
+    ("1,05.04.2026,0", "sıfırdan büyük"),
+    ("1,05.04.2026,-10", "sıfırdan büyük"),
+    ("1,01.01.2025,100", "işe başlama tarihinden önce"),
+    ("1,05.04.2026", "en az çalışan, tarih ve tutar"),
+])
+def test_rejects_the_whole_file_for_one_invalid_row(tmp_path, connection, line, message):
+    path = write_file(tmp_path, f"1,01.04.2026,100\n{line}\n2,02.04.2026,200\n")
+    with pytest.raises(AdvanceImportError) as raised:
+        import_advances(connection, path)
+    assert raised.value.error_count == 1
+    assert raised.value.errors[0].startswith("Satır 2:")
+    assert message in raised.value.errors[0]
+    assert advance_rows(connection) == []
+    assert connection.execute("SELECT COUNT(*) FROM monthly_summary").fetchone() == (0,)
+
+
+def test_reports_every_invalid_row(tmp_path, connection):
+    path = write_file(tmp_path, "".join(f"Veli Demir,05.04.2026,{amount}\n" for amount in range(1, 61)))
+    with pytest.raises(AdvanceImportError) as raised:
+        import_advances(connection, path)
+    assert raised.value.error_count == 60
+    assert raised.value.report().endswith("... ve 10 hata daha")
+    assert advance_rows(connection) == []
@@ -0,0 +1,179 @@
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from database import connect, rebuild_monthly_summary
+from migrations import CURRENT_VERSION, MigrationError, migrate, schema_version
+from payroll import month_index
+
+
+def create_v0_database(path):
+    """A database of the releases before migrations: REAL lira amounts, no description column"""
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            start_date TEXT NOT NULL,
+            salary REAL NOT NULL
+        );
+        CREATE TABLE advances (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        );
+        CREATE TABLE salaries (
+            employee_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            salary REAL NOT NULL,
+            PRIMARY KEY (employee_id, year, month),
+            FOREIGN KEY(employee_id) REFERENCES employees(id) ON DELETE CASCADE
+        );
+        INSERT INTO employees (first_name, last_name, start_date, salary) VALUES
+            ('Ayşe', 'Yılmaz', '2025-03-10', 25000.5),
+            ('Mehmet', 'Çelik', '2026-01-01', 30000);
+        INSERT INTO advances (employee_id, date, amount) VALUES
+            (1, '2026-02-03', 1000.145),
+            (1, '2026-02-20', 0.005),
+            (1, '2026-03-01', 2500),
+            (2, '2026-03-15', 999.99),
+            (3, '2026-03-15', 50);
+        INSERT INTO salaries (employee_id, year, month, salary) VALUES
+            (1, 2026, 3, 27500.25),
+            (2, 2026, 4, 31000.125),
+            (3, 2026, 4, 10000);
+    """)
+    connection.commit()
+    connection.close()
+
+
+def summary_rows(connection):
+    return connection.execute("SELECT * FROM monthly_summary ORDER BY employee_id, year, month").fetchall()
+
+
+def test_migrates_v0_database(tmp_path):
+    path = tmp_path / "otel_maas.db"
+    create_v0_database(path)
+    connection = connect(str(path))
+
+    assert migrate(connection) == CURRENT_VERSION
+    assert schema_version(connection) == CURRENT_VERSION
+    assert migrate(connection) == 0
+    assert list(tmp_path.glob("otel_maas.db.v0-*.bak"))
+
+    # Amounts are rounded half away from zero to INTEGER kuruş
+    assert connection.execute("SELECT id, salary, typeof(salary) FROM employees ORDER BY id").fetchall() == [
+        (1, 2500050, "integer"), (2, 3000000, "integer"),
+    ]
+    # Rows of the employee deleted while foreign keys were not enforced are gone
+    assert connection.execute(
+        "SELECT employee_id, date, period, amount, typeof(amount), description FROM advances ORDER BY id"
+    ).fetchall() == [
+        (1, "2026-02-03", month_index(2, 2026), 100015, "integer", None),
+        (1, "2026-02-20", month_index(2, 2026), 1, "integer", None),
+        (1, "2026-03-01", month_index(3, 2026), 250000, "integer", None),
+        (2, "2026-03-15", month_index(3, 2026), 99999, "integer", None),
+    ]
+    assert connection.execute("SELECT employee_id, period, salary FROM salaries ORDER BY employee_id").fetchall() == [
+        (1, month_index(3, 2026), 2750025), (2, month_index(4, 2026), 3100013),
+    ]
+    assert summary_rows(connection) == [
+        (1, 2026, 2, None, 100016, 2, month_index(2, 2026)),
+        (1, 2026, 3, 2750025, 250000, 1, month_index(3, 2026)),
+        (2, 2026, 3, None, 99999, 1, month_index(3, 2026)),
+        (2, 2026, 4, 3100013, 0, 0, month_index(4, 2026)),
+    ]
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(period_closings)")}
+    assert "idx_period_closings_employee_period" in indexes
+
+    # The period column is checked against the date
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute("INSERT INTO advances (employee_id, date, period, amount) VALUES (1, '2026-05-01', ?, 100)",
+                           (month_index(4, 2026),))
+    connection.close()
+
+
+def test_keeps_triggers_it_did_not_create(tmp_path):
+    path = tmp_path / "otel_maas.db"
+    create_v0_database(path)
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT NOT NULL, changed TEXT);
+        CREATE TRIGGER notes_changed AFTER INSERT ON notes
+        BEGIN UPDATE notes SET changed = 'yes' WHERE id = NEW.id; END;
+    """)
+    connection.close()
+    connection = connect(str(path))
+    migrate(connection)
+
+    connection.execute("INSERT INTO notes (text) VALUES ('not')")
+    assert connection.execute("SELECT changed FROM notes").fetchall() == [("yes",)]
+    connection.close()
+
+
+def test_refuses_newer_database(tmp_path):
+    connection = connect(str(tmp_path / "otel_maas.db"))
+    connection.execute(f"PRAGMA user_version = {CURRENT_VERSION + 1}")
+    with pytest.raises(MigrationError):
+        migrate(connection)
+    connection.close()
+
+
+def test_triggers_keep_monthly_summary_equal_to_rebuild(tmp_path):
+    connection = connect(str(tmp_path / "otel_maas.db"))
+    migrate(connection)
+    rng = random.Random(0)
+    cursor = connection.cursor()
+    for number in range(5):
+        cursor.execute("INSERT INTO employees (first_name, last_name, start_date, salary) VALUES (?, ?, ?, ?)",
+                       (f"Ad{number}", f"Soyad{number}", "2025-01-01", rng.randrange(1000000, 5000000)))
+    employee_ids = [row[0] for row in cursor.execute("SELECT id FROM employees")]
+    first_day = date(2025, 1, 1)
+
+    def random_day():
+        return first_day + timedelta(days=rng.randrange(500))
+
+    for _ in range(500):
+        action = rng.random()
+        advance_ids = [row[0] for row in cursor.execute("SELECT id FROM advances")]
+        if action < 0.35 or not advance_ids:
+            day = random_day()
+            cursor.execute("INSERT INTO advances (employee_id, date, period, amount) VALUES (?, ?, ?, ?)",
+                           (rng.choice(employee_ids), day.isoformat(), month_index(day.month, day.year),
+                            rng.randrange(1, 1000000)))
+        elif action < 0.5:
+            cursor.execute("DELETE FROM advances WHERE id = ?", (rng.choice(advance_ids),))
+        elif action < 0.55:
+            day = random_day()
+            cursor.execute("UPDATE advances SET date = ?, period = ? WHERE id = ?",
+                           (day.isoformat(), month_index(day.month, day.year), rng.choice(advance_ids)))
+        elif action < 0.6:
+            cursor.execute("UPDATE advances SET employee_id = ? WHERE id = ?",
+                           (rng.choice(employee_ids), rng.choice(advance_ids)))
+        elif action < 0.65:
+            cursor.execute("UPDATE advances SET amount = ? WHERE id = ?",
+                           (rng.randrange(1, 1000000), rng.choice(advance_ids)))
+        elif action < 0.85:
+            day = random_day()
+            cursor.execute("INSERT OR REPLACE INTO salaries (employee_id, period, salary) VALUES (?, ?, ?)",
+                           (rng.choice(employee_ids), month_index(day.month, day.year),
+                            rng.randrange(1000000, 5000000)))
+        else:
+            salary_keys = cursor.execute("SELECT employee_id, period FROM salaries").fetchall()
+            if salary_keys:
+                cursor.execute("DELETE FROM salaries WHERE employee_id = ? AND period = ?", rng.choice(salary_keys))
+    # Deleting an employee cascades to its advances and salaries
+    cursor.execute("DELETE FROM employees WHERE id = ?", (employee_ids[0],))
+    connection.commit()
+
+    maintained = summary_rows(connection)
+    assert maintained
+    rebuild_monthly_summary(connection)
+    assert summary_rows(connection) == maintained
+    connection.close()
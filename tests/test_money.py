@@ -0,0 +1,44 @@
+import pytest
+
+from advance_import import parse_amount
+from money import format_money, to_kurus
+
+
+@pytest.mark.parametrize("value, kurus", [
+    ("1500", 150000),
+    ("1500.5", 150050),
+    (" 1500.50 ", 150050),
+    (1500, 150000),
+    (0.1, 10),
+    ("0.005", 1),
+    ("0.004", 0),
+    ("2.675", 268),
+    (2.675, 268),
+    ("-0.005", -1),
+    ("-12.345", -1235),
+])
+def test_to_kurus_rounds_half_up(value, kurus):
+    assert to_kurus(value) == kurus
+
+
+@pytest.mark.parametrize("value", ["", "  ", "abc", "1,5", "12a", "nan", "inf", "-Infinity", None])
+def test_to_kurus_rejects_invalid_amounts(value):
+    with pytest.raises(ValueError):
+        to_kurus(value)
+
+
+@pytest.mark.parametrize("text, kurus", [
+    ("1500,5", 150050),
+    ("1.500,50", 150050),
+    ("1 500,50", 150050),
+    ("1.234.567,891", 123456789),
+    ("1500.50", 150050),
+])
+def test_parse_amount_accepts_decimal_comma(text, kurus):
+    assert parse_amount(text) == kurus
+
+
+@pytest.mark.parametrize("kurus, text", [(0, "0.00"), (5, "0.05"), (-5, "-0.05"), (150050, "1500.50"), (-123456, "-1234.56")])
+def test_format_money_round_trips(kurus, text):
+    assert format_money(kurus) == text
+    assert to_kurus(text) == kurus
@@ -0,0 +1,258 @@
+import calendar
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from payroll import (
+    CarryCache, PayDayIndex, PayrollLedger, SettlementPeriod, month_from_index, month_index, settle,
+)
+
+
+def reference_balance(start_date, base_salary, salaries, advances, month, year):
+    """Balance through the month, summed month by month from the start month"""
+    balance = 0
+    for index in range(month_index(start_date.month, start_date.year), month_index(month, year) + 1):
+        balance_year, balance_month = month_from_index(index)
+        salary = salaries.get((balance_year, balance_month), base_salary)
+        if index == month_index(start_date.month, start_date.year) and start_date.day != 1:
+            days = calendar.monthrange(balance_year, balance_month)[1] - start_date.day + 1
+            # salary / 30 * days, rounded half up to the kuruş
+            salary = (salary * days * 2 + 30) // 60
+        balance += salary - advances.get((balance_year, balance_month), 0)
+    return balance
+
+
+def random_ledger_data(rng, start_date, months):
+    first = month_index(start_date.month, start_date.year)
+    salaries, advances = {}, {}
+    for index in rng.sample(range(first, first + months), months // 4):
+        salaries[month_from_index(index)] = rng.randrange(1000000, 5000000)
+    # Advances dated before the start month never count
+    for index in rng.sample(range(first - 3, first + months), months // 2):
+        advances[month_from_index(index)] = rng.randrange(1, 3000000)
+    return salaries, advances
+
+
+class CountingLedger(PayrollLedger):
+    """PayrollLedger counting the months it sums"""
+
+    summed = 0
+
+    def earned_salary_for_month(self, month, year):
+        self.summed += 1
+        return super().earned_salary_for_month(month, year)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_ledger_matches_month_by_month_reference(seed):
+    rng = random.Random(seed)
+    start_date = date(2020, rng.randrange(1, 13), rng.randrange(1, 29))
+    base_salary = rng.randrange(1000000, 5000000)
+    salaries, advances = random_ledger_data(rng, start_date, 60)
+    ledger = PayrollLedger(1, start_date, base_salary, salaries, advances, cache=CarryCache())
+
+    for index in rng.sample(range(month_index(1, 2020), month_index(12, 2025) + 1), 30):
+        year, month = month_from_index(index)
+        expected = reference_balance(start_date, base_salary, salaries, advances, month, year)
+        assert ledger.remaining_salary_for_month(month, year) == expected
+        previous_year, previous_month = month_from_index(index - 1)
+        assert ledger.carried_salary_for_month(month, year) == reference_balance(
+            start_date, base_salary, salaries, advances, previous_month, previous_year)
+
+
+def test_ledger_sums_from_the_latest_closing():
+    start_date = date(2021, 3, 15)
+    salaries, advances = random_ledger_data(random.Random(1), start_date, 48)
+    closed = reference_balance(start_date, 2000000, salaries, advances, 12, 2022)
+    ledger = CountingLedger(1, start_date, 2000000, salaries, advances, cache=CarryCache(),
+                            closings={(2022, 12): closed})
+
+    assert ledger.remaining_salary_for_month(6, 2023) == reference_balance(
+        start_date, 2000000, salaries, advances, 6, 2023)
+    assert ledger.summed == 6
+    # Closed months answer with the closing, months before it are summed
+    assert ledger.remaining_salary_for_month(12, 2022) == closed
+    assert ledger.remaining_salary_for_month(2, 2021) == 0
+
+
+def test_carry_cache_reuses_balances():
+    cache = CarryCache()
+    salaries, advances = random_ledger_data(random.Random(2), date(2024, 1, 1), 24)
+    ledger = CountingLedger(1, date(2024, 1, 1), 2000000, salaries, advances, cache=cache)
+
+    ledger.remaining_salary_for_month(12, 2025)
+    assert ledger.summed == 24
+    ledger.remaining_salary_for_month(6, 2025)
+    ledger.carried_salary_for_month(12, 2025)
+    assert ledger.summed == 24
+
+    # Another ledger with the same totals reuses them too
+    other = CountingLedger(1, date(2024, 1, 1), 2000000, dict(salaries), dict(advances), cache=cache)
+    other.remaining_salary_for_month(12, 2025)
+    assert other.summed == 0
+
+
+def test_carry_cache_invalidate_truncates_from_the_month():
+    cache = CarryCache()
+    salaries, advances = random_ledger_data(random.Random(3), date(2024, 1, 1), 24)
+    ledger = CountingLedger(1, date(2024, 1, 1), 2000000, salaries, advances, cache=cache)
+    ledger.remaining_salary_for_month(12, 2025)
+
+    ledger.advances = dict(advances)
+    ledger.advances[(2025, 9)] = ledger.advances.get((2025, 9), 0) + 12345
+    ledger.invalidate(9, 2025)
+    ledger.summed = 0
+    assert cache.get(1, 2025, 8) is not None
+    assert cache.get(1, 2025, 9) is None
+    assert ledger.remaining_salary_for_month(12, 2025) == reference_balance(
+        date(2024, 1, 1), 2000000, salaries, ledger.advances, 12, 2025)
+    assert ledger.summed == 4
+
+    ledger.invalidate()
+    assert cache.get(1, 2024, 1) is None
+
+
+def test_carry_cache_drops_balances_from_the_first_changed_total():
+    cache = CarryCache()
+    salaries, advances = random_ledger_data(random.Random(4), date(2024, 1, 1), 24)
+    CountingLedger(1, date(2024, 1, 1), 2000000, salaries, advances, cache=cache).remaining_salary_for_month(12, 2025)
+
+    # Totals re-read after another connection changed a month, without invalidate()
+    changed = dict(salaries)
+    changed[(2025, 3)] = 4321000
+    ledger = CountingLedger(1, date(2024, 1, 1), 2000000, changed, dict(advances), cache=cache)
+    assert ledger.remaining_salary_for_month(12, 2025) == reference_balance(
+        date(2024, 1, 1), 2000000, changed, advances, 12, 2025)
+    assert ledger.summed == 10
+
+    # A different base salary changes every month
+    ledger = CountingLedger(1, date(2024, 1, 1), 2100000, changed, dict(advances), cache=cache)
+    assert ledger.remaining_salary_for_month(12, 2025) == reference_balance(
+        date(2024, 1, 1), 2100000, changed, advances, 12, 2025)
+    assert ledger.summed == 24
+
+
+def test_carry_cache_resets_when_the_opening_moves():
+    cache = CarryCache()
+    start_date = date(2023, 1, 1)
+    salaries, advances = random_ledger_data(random.Random(5), start_date, 36)
+    CountingLedger(1, start_date, 2000000, salaries, advances, cache=cache).remaining_salary_for_month(12, 2025)
+
+    closed = reference_balance(start_date, 2000000, salaries, advances, 12, 2024)
+    ledger = CountingLedger(1, start_date, 2000000, salaries, advances, cache=cache,
+                            closings={(2024, 12): closed + 100})
+    assert ledger.remaining_salary_for_month(12, 2025) == reference_balance(
+        start_date, 2000000, salaries, advances, 12, 2025) + 100
+    assert ledger.summed == 12
+
+
+def reference_settlement(start_date, end_date, salary_for_month, advances):
+    """
+    (periods, total advances) of a settlement found by walking the calendar day by
+    day: a period starts on the start day of each month, or on the last day of
+    months without it
+    """
+    starts = []
+    day = start_date
+    while day <= end_date + timedelta(days=1):
+        if day.day == min(start_date.day, calendar.monthrange(day.year, day.month)[1]):
+            starts.append(day)
+        day += timedelta(days=1)
+    periods = [SettlementPeriod(start, end - timedelta(days=1), (end - start).days,
+                                salary_for_month(start.month, start.year), True)
+               for start, end in zip(starts, starts[1:])]
+    if starts[-1] <= end_date:
+        days = (end_date - starts[-1]).days + 1
+        salary = salary_for_month(starts[-1].month, starts[-1].year)
+        periods.append(SettlementPeriod(starts[-1], end_date, days, (salary * days * 2 + 30) // 60, False))
+    total_advances = sum(total for (year, month), total in advances.items()
+                         if (start_date.year, start_date.month) <= (year, month) <= (end_date.year, end_date.month))
+    return periods, total_advances
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_settle_matches_day_by_day_reference(seed):
+    rng = random.Random(seed)
+    # Start days 28-31 are the interesting ones, so they are drawn more often
+    start_date = date(2023, rng.randrange(1, 13), 1) + timedelta(days=rng.choice([0, 14, 27, 28, 29, 30]))
+    end_date = start_date + timedelta(days=rng.randrange(0, 1200))
+    salaries, advances = random_ledger_data(rng, start_date, 42)
+
+    def salary_for_month(month, year):
+        return salaries.get((year, month), 2500000)
+
+    settlement = settle(start_date, end_date, salary_for_month, advances)
+    periods, total_advances = reference_settlement(start_date, end_date, salary_for_month, advances)
+    assert settlement.periods == periods
+    assert settlement.total_salary == sum(period.amount for period in periods)
+    assert settlement.total_advances == total_advances
+    assert settlement.net == settlement.total_salary - total_advances
+    assert sum(period.days for period in settlement.periods) == (end_date - start_date).days + 1
+
+
+@pytest.mark.parametrize("start_date, end_date, full, last_days", [
+    (date(2026, 1, 31), date(2026, 2, 27), 1, 0),
+    (date(2026, 1, 31), date(2026, 2, 28), 1, 1),
+    (date(2026, 1, 31), date(2026, 3, 30), 2, 0),
+    (date(2026, 3, 15), date(2026, 3, 15), 0, 1),
+    (date(2026, 3, 15), date(2026, 4, 14), 1, 0),
+    (date(2028, 1, 30), date(2028, 2, 28), 1, 0),
+])
+def test_settle_short_months(start_date, end_date, full, last_days):
+    settlement = settle(start_date, end_date, lambda month, year: 3000000, {})
+    assert [period.full for period in settlement.periods].count(True) == full
+    assert (0 if settlement.periods[-1].full else settlement.periods[-1].days) == last_days
+
+
+@pytest.fixture
+def pay_days():
+    index = PayDayIndex()
+    for day in (1, 15, 28, 29, 30, 31):
+        index.add(day, date(2025, 1, day), f"data {day}")
+    return index
+
+
+def due_ids(index, day_date):
+    return sorted(employee_id for employee_id, _ in index.due_on(day_date))
+
+
+@pytest.mark.parametrize("day_date, due", [
+    # February: the 28th is also the pay day of those who started on the 29th-31st
+    (date(2026, 2, 27), []),
+    (date(2026, 2, 28), [28, 29, 30, 31]),
+    (date(2028, 2, 28), [28]),
+    (date(2028, 2, 29), [29, 30, 31]),
+    # 30-day months
+    (date(2026, 4, 29), [29]),
+    (date(2026, 4, 30), [30, 31]),
+    (date(2026, 3, 30), [30]),
+    (date(2026, 3, 31), [31]),
+    (date(2026, 3, 1), [1]),
+    (date(2026, 3, 15), [15]),
+])
+def test_due_on_short_months(pay_days, day_date, due):
+    assert due_ids(pay_days, day_date) == due
+
+
+def test_due_on_matches_pay_day(pay_days):
+    day_date = date(2026, 1, 1)
+    while day_date < date(2029, 1, 1):
+        expected = [day for day in (1, 15, 28, 29, 30, 31)
+                    if min(day, calendar.monthrange(day_date.year, day_date.month)[1]) == day_date.day]
+        assert due_ids(pay_days, day_date) == expected
+        day_date += timedelta(days=1)
+
+
+def test_due_on_skips_start_date_and_removed_employees(pay_days):
+    pay_days.add(29, date(2026, 2, 28), "moved")
+    assert dict(pay_days.due_on(date(2026, 2, 28))) == {28: "data 28", 30: "data 30", 31: "data 31"}
+    assert dict(pay_days.due_on(date(2026, 3, 28))) == {28: "data 28", 29: "moved"}
+
+    pay_days.remove(30)
+    assert due_ids(pay_days, date(2026, 4, 30)) == [31]
+    assert len(pay_days) == 5
+    assert pay_days.next_due_date(date(2026, 4, 16)) == date(2026, 4, 28)
+    assert pay_days.next_due_date(date(2026, 4, 30)) == date(2026, 4, 30)
+    pay_days.clear()
+    assert pay_days.next_due_date(date(2026, 4, 16)) is None
@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.generate_data import generate  # noqa: E402
+from database import connect  # noqa: E402
+from payroll_batch import close_periods, iter_ledgers  # noqa: E402
+from payroll_numpy import load_roster, roster_balances  # noqa: E402
+
+MONTHS = [(1, 2019), (12, 2021), (2, 2024), (3, 2026), (10, 2026), (5, 2027)]
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = connect(str(tmp_path / "otel_maas.db"))
+    generate(connection, employees=60, years=8, overrides=2, advances=2, as_of=date(2026, 10, 15), seed=7)
+    yield connection
+    connection.close()
+
+
+def python_balances(connection, month, year):
+    """roster_balances computed with PayrollLedger, employee by employee"""
+    columns = {"salary": [], "earned": [], "advances": [], "carried": [], "remaining": []}
+    for _, _, ledger in iter_ledgers(connection, month, year):
+        summary = ledger.month_summary(month, year)
+        for name, values in columns.items():
+            values.append(getattr(summary, name))
+    return columns
+
+
+def assert_backends_agree(connection):
+    for month, year in MONTHS:
+        balances = roster_balances(load_roster(connection, month, year), month, year)
+        for name, values in python_balances(connection, month, year).items():
+            assert balances[name].tolist() == values, (name, month, year)
+
+
+def test_backends_agree(connection):
+    assert_backends_agree(connection)
+
+
+@pytest.mark.parametrize("monthly", [False, True])
+def test_backends_agree_with_period_closings(connection, monthly):
+    assert close_periods(connection, 9, 2026, monthly) > 0
+    assert_backends_agree(connection)
+
+
+def test_backends_agree_on_an_empty_roster(tmp_path):
+    connection = connect(str(tmp_path / "otel_maas.db"))
+    generate(connection, employees=0, years=1, as_of=date(2026, 10, 15))
+    balances = roster_balances(load_roster(connection, 10, 2026), 10, 2026)
+    assert all(len(values) == 0 for values in balances.values())
+    connection.close()